@@ -3,7 +3,15 @@ import os
 
 # from flask_mongoengine import MongoEngine, Document
 # from flask_login import LoginManager
-from .extensions import db, login_manager, cors
+from .extensions import db, login_manager, cors, metrics, profiler
+from .config import load_config, mongodb_settings
+from .utils.monitoring import pool_monitor
+from .utils.log import configure_logging, get_logger, debug_sampled
+from .utils.json_provider import json_provider
+from .models.package import package_cache
+from .models.token import token_cache
+from .models.users import user_cache
+from .utils.fragments import fragment_cache
 from .models.users import User
 
 # Register Blueprint so we can factor routes
@@ -16,20 +24,24 @@ from .controllers.packageController import package
 from .controllers.api import api
 from .controllers.api_review import api_review
 from .routes import main
+from .commands import trend_cli, ratings_cli, indexes_cli, jobs_cli, dataset_cli
 
 # import pymongo
 
+log = get_logger('app')
+
 def create_app():
+    # queue-backed, level-gated logging configured from the environment (LOG_LEVEL, LOG_LEVELS)
+    configure_logging()
     app = Flask(__name__)
 
-    host = 'localhost' if os.getenv('FLASK_ENV') == 'development' else 'db'
-
-    app.config['MONGODB_SETTINGS'] = {
-        'db':'staycation',
-        # 'host':'localhost' # choose this one when running locally
-        # 'host':'db'      # choose this one when running as containers
-        'host' : host
-    }
+    # Mongo host, pool sizing, compression and read preferences come from the
+    # environment or a STAYCATION_SETTINGS file (see app/config.py)
+    app.config.update(load_config())
+    app.config.from_envvar('STAYCATION_SETTINGS', silent=True)
+    app.config['MONGODB_SETTINGS'] = mongodb_settings(app.config)
+    # orjson-backed jsonify() (stdlib fallback) that also handles ObjectId
+    app.json = json_provider(app)
     app.static_folder = 'assets'
     
     # db = MongoEngine(app)
@@ -37,6 +49,26 @@ def create_app():
     login_manager.init_app(app)
     cors.init_app(app)
 
+    # per-endpoint latency, Mongo commands and response size on /metrics
+    metrics.init_app(app)
+    caches = {'package': package_cache, 'token': token_cache, 'user': user_cache, 'fragment': fragment_cache}
+    metrics.add_collector('staycation_cache_hits_total', 'In-process cache hits.',
+        lambda: [({'cache': name}, cache.stats()['hits']) for name, cache in caches.items()], kind='counter')
+    metrics.add_collector('staycation_cache_misses_total', 'In-process cache misses.',
+        lambda: [({'cache': name}, cache.stats()['misses']) for name, cache in caches.items()], kind='counter')
+    metrics.add_collector('staycation_mongo_pool_connections', 'Open Mongo connections in this worker.',
+        lambda: [({}, pool_monitor.stats()['open'])])
+    metrics.add_collector('staycation_mongo_pool_checked_out', 'Mongo connections in use.',
+        lambda: [({}, pool_monitor.stats()['checked_out'])])
+    metrics.add_collector('staycation_mongo_pool_waiting', 'Threads waiting for a Mongo connection.',
+        lambda: [({}, pool_monitor.stats()['waiting'])])
+    metrics.add_collector('staycation_mongo_pool_max_size', 'Configured maximum Mongo pool size.',
+        lambda: [({}, app.config['MONGO_MAX_POOL_SIZE'])])
+    metrics.add_collector('staycation_mongo_pool_checkout_failures_total', 'Failed Mongo connection checkouts (e.g. wait queue timeouts).',
+        lambda: [({}, pool_monitor.stats()['checkout_failures'])], kind='counter')
+    # N+1 and slow query log, when QUERY_PROFILER_LOG is set
+    profiler.init_app(app)
+
     app.config['SECRET_KEY'] = '9OLWxND4o83j4K4iuopO'
     app.config['DEBUG_TB_ENABLED'] = True
     app.config['DEBUG_TB_INTERCEPT_REDIRECTS'] = False
@@ -49,8 +81,8 @@ def create_app():
     # Load the current user if any
     @login_manager.user_loader
     def load_user(user_id):
-        print('loading user_id: ', user_id)
-        return User.getUserById(user_id)
+        debug_sampled(log, 'loading user_id %s', user_id)
+        return User.getSessionUser(user_id)
 
     # register blueprint from respective module
     app.register_blueprint(dashboard)
@@ -61,6 +93,13 @@ def create_app():
     app.register_blueprint(main)
     app.register_blueprint(api_review)
 
+    # register maintenance commands (flask --app app trend rebuild, flask --app app indexes check)
+    app.cli.add_command(trend_cli)
+    app.cli.add_command(ratings_cli)
+    app.cli.add_command(indexes_cli)
+    app.cli.add_command(jobs_cli)
+    app.cli.add_command(dataset_cli)
+
     @app.template_filter('formatdate') # use this name
     def format_date(value, format="%#d/%m/%Y"):
         """Format a date time to (Default): dd/mm/YYYY"""
@@ -0,0 +1,82 @@
+import click
+import datetime as dt
+from flask.cli import AppGroup
+
+from app.models.trend import HotelDailyCost
+from app.models.rating import PackageRating
+from app.utils.indexes import create_indexes, index_report
+from app.utils.jobs import work, UPLOAD_JOB_MAX_RATE, UPLOAD_JOB_STALL_TIMEOUT
+from app.utils.synthetic import DatasetGenerator
+
+# Maintenance commands, run with `flask --app app <group> <command>`
+trend_cli = AppGroup('trend', help='Maintain the booking trend rollup used by /trend_chart.')
+ratings_cli = AppGroup('ratings', help='Maintain the per-package rating summaries.')
+jobs_cli = AppGroup('jobs', help='Run the background worker that processes /upload jobs.')
+indexes_cli = AppGroup('indexes', help='Create and verify the Mongo indexes declared on the documents.')
+dataset_cli = AppGroup('dataset', help='Generate synthetic users, packages, bookings and reviews.')
+
+@trend_cli.command('rebuild')
+def rebuild_trend():
+    """Rebuild the daily hotel cost rollup from all bookings"""
+    rows = HotelDailyCost.rebuild()
+    click.echo(f"Trend rollup rebuilt with {rows} hotel/day rows")
+
+@ratings_cli.command('reconcile')
+def reconcile_ratings():
+    """Recount the rating summaries from the reviews and fix the ones that drifted"""
+    corrected = PackageRating.reconcile()
+    click.echo(f"Rating summaries reconciled, {corrected} packages corrected")
+
+@indexes_cli.command('create')
+def create_all_indexes():
+    """Create every declared index that does not exist yet"""
+    for collection in create_indexes():
+        click.echo(f"{collection}: indexes ensured")
+
+@indexes_cli.command('check')
+def check_indexes():
+    """Report missing, undeclared and unused indexes; exits with 1 if any declared index is missing"""
+    missing = False
+    for entry in index_report():
+        click.echo(f"{entry['collection']}:")
+        for key in ('missing', 'extra', 'unused'):
+            for index in entry[key]:
+                click.echo(f"  {key}: {index}")
+        if not (entry['missing'] or entry['extra'] or entry['unused']):
+            click.echo("  ok")
+        missing = missing or bool(entry['missing'])
+    if missing:
+        raise SystemExit(1)
+
+@jobs_cli.command('worker')
+@click.option('--poll', default=2.0, show_default=True, help='Seconds to wait when the queue is empty.')
+@click.option('--once', is_flag=True, help='Exit once the queue is empty.')
+@click.option('--max-rate', default=UPLOAD_JOB_MAX_RATE, show_default=True, help='Rows per second per job, 0 for no limit.')
+@click.option('--stall-timeout', default=UPLOAD_JOB_STALL_TIMEOUT, show_default=True, help='Seconds without progress before a running job is claimed again.')
+def run_worker(poll, once, max_rate, stall_timeout):
+    """Process queued CSV uploads"""
+    processed = work(poll_interval=poll, once=once, max_rate=max_rate, stall_timeout=stall_timeout)
+    click.echo(f"Processed {processed} upload jobs")
+
+@dataset_cli.command('generate')
+@click.option('--users', default=1000, show_default=True, help='Number of users.')
+@click.option('--packages', default=50, show_default=True, help='Number of packages.')
+@click.option('--bookings', default=10000, show_default=True, help='Number of bookings.')
+@click.option('--review-rate', default=0.3, show_default=True, help='Share of bookings that get a review.')
+@click.option('--seed', default=381, show_default=True, help='Same seed, same data.')
+@click.option('--start', default='2024-01-01', show_default=True, help='First check-in date (YYYY-MM-DD).')
+@click.option('--days', default=730, show_default=True, help='Days of check-in dates from --start.')
+@click.option('--csv', 'directory', help='Write /upload CSV files to this directory instead of inserting into Mongo.')
+@click.option('--batch-size', type=int, help='Rows per insert_many (default UPLOAD_BATCH_SIZE).')
+def generate_dataset(users, packages, bookings, review_rate, seed, start, days, directory, batch_size):
+    """Generate a synthetic dataset with seasonal check-ins and skewed ratings"""
+    generator = DatasetGenerator(users, packages, bookings, review_rate=review_rate, seed=seed,
+                                 start=dt.date.fromisoformat(start), days=days)
+    if directory:
+        for name, rows in generator.write_csv(directory).items():
+            click.echo(f"{name}: {rows} rows")
+        return
+    reports = generator.insert(batch_size=batch_size,
+        progress=lambda report: click.echo(f"{report.datatype}: {report.rows} rows", err=True))
+    for report in reports.values():
+        click.echo(f"{report.datatype}: {report.inserted} inserted, {report.failed} failed")
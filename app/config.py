@@ -0,0 +1,66 @@
+import os
+from flask import current_app, has_app_context
+from pymongo import ReadPreference
+
+READ_PREFERENCES = {
+    'primary': ReadPreference.PRIMARY,
+    'primaryPreferred': ReadPreference.PRIMARY_PREFERRED,
+    'secondary': ReadPreference.SECONDARY,
+    'secondaryPreferred': ReadPreference.SECONDARY_PREFERRED,
+    'nearest': ReadPreference.NEAREST,
+}
+
+def _int(name, default=None):
+    value = os.getenv(name)
+    return int(value) if value not in (None, '') else default
+
+def load_config():
+    """
+    Defaults read from the environment when the app is created (so a .env loaded after
+    importing the app still applies). A Python file named by STAYCATION_SETTINGS
+    (Flask config syntax, e.g. MONGO_MAX_POOL_SIZE = 20) overrides them.
+    """
+    return {
+        'MONGO_DB': os.getenv('MONGO_DB', 'staycation'),
+        # localhost when running locally, db when running as containers
+        'MONGO_HOST': os.getenv('MONGO_HOST', 'localhost' if os.getenv('FLASK_ENV') == 'development' else 'db'),
+        'MONGO_MAX_POOL_SIZE': _int('MONGO_MAX_POOL_SIZE', 100),
+        'MONGO_MIN_POOL_SIZE': _int('MONGO_MIN_POOL_SIZE', 0),
+        'MONGO_WAIT_QUEUE_TIMEOUT_MS': _int('MONGO_WAIT_QUEUE_TIMEOUT_MS'),
+        'MONGO_SERVER_SELECTION_TIMEOUT_MS': _int('MONGO_SERVER_SELECTION_TIMEOUT_MS', 30000),
+        'MONGO_CONNECT_TIMEOUT_MS': _int('MONGO_CONNECT_TIMEOUT_MS', 20000),
+        # e.g. 'zstd,snappy,zlib'; zstd needs zstandard and snappy needs python-snappy installed
+        'MONGO_COMPRESSORS': os.getenv('MONGO_COMPRESSORS', ''),
+        'MONGO_READ_PREFERENCE': os.getenv('MONGO_READ_PREFERENCE', 'primary'),
+        # used by read-only, staleness-tolerant queries (package catalogue, trend chart)
+        'MONGO_READ_ONLY_READ_PREFERENCE': os.getenv('MONGO_READ_ONLY_READ_PREFERENCE', 'secondaryPreferred'),
+        # 'orjson' (used when installed) or 'stdlib', see app/utils/json_provider.py
+        'JSON_PROVIDER': os.getenv('JSON_PROVIDER', 'orjson'),
+        # ISO 8601 datetimes in API responses instead of Flask's HTTP dates
+        'JSON_ISO_DATES': os.getenv('JSON_ISO_DATES', '') not in ('', '0', 'false'),
+    }
+
+def mongodb_settings(config):
+    """Build flask-mongoengine's MONGODB_SETTINGS (MongoClient options) from the app config."""
+    for key in ('MONGO_READ_PREFERENCE', 'MONGO_READ_ONLY_READ_PREFERENCE'):
+        if config[key] not in READ_PREFERENCES:
+            raise ValueError(f"{key} must be one of {', '.join(READ_PREFERENCES)}")
+    settings = {
+        'db': config['MONGO_DB'],
+        'host': config['MONGO_HOST'],
+        'maxPoolSize': config['MONGO_MAX_POOL_SIZE'],
+        'minPoolSize': config['MONGO_MIN_POOL_SIZE'],
+        'waitQueueTimeoutMS': config['MONGO_WAIT_QUEUE_TIMEOUT_MS'],
+        'serverSelectionTimeoutMS': config['MONGO_SERVER_SELECTION_TIMEOUT_MS'],
+        'connectTimeoutMS': config['MONGO_CONNECT_TIMEOUT_MS'],
+        'compressors': config['MONGO_COMPRESSORS'] or None,
+        'readPreference': config['MONGO_READ_PREFERENCE'],
+    }
+    return {key: value for key, value in settings.items() if value is not None}
+
+def read_only_preference():
+    """The read preference of read-only queries that can tolerate replication lag."""
+    name = current_app.config.get('MONGO_READ_ONLY_READ_PREFERENCE') if has_app_context() else None
+    if name is None:
+        name = load_config()['MONGO_READ_ONLY_READ_PREFERENCE']
+    return READ_PREFERENCES[name]
@@ -1,6 +1,4 @@
 from flask import jsonify, request, Blueprint
-from bson import json_util
-import json
 
 # Import the models
 from app.models.users import User
@@ -9,6 +7,10 @@ from app.models.book import Booking
 
 from app.utils.api import extract_keys
 from app.utils.api_auth import api_auth, generate_user_token
+from app.utils.log import get_logger, debug_sampled
+from app.utils.http_cache import conditional
+
+log = get_logger('api')
 
 api = Blueprint('api', __name__)
 
@@ -42,13 +44,12 @@ def api_gettoken():
         return jsonify({'token': token}), 200
 
 # The API route to get all packages  
-@api.route('/api/package/getAllPackages', methods=['POST'])
+@api.route('/api/package/getAllPackages', methods=['GET', 'POST'])
 @api_auth.login_required
+@conditional(lambda: Package.catalogueVersion(), private=True)
 def getAllPackages():
-    print("getAllPackages endpoint accessed")
-    allPackages = Package.getAllPackages()
-    packages_list = [json.loads(json_util.dumps(package.to_mongo())) for package in allPackages]
-    projected_list = [extract_keys(k, idx+1) for idx, k in enumerate(packages_list)]
+    debug_sampled(log, 'getAllPackages endpoint accessed')
+    projected_list = [extract_keys(k, idx+1) for idx, k in enumerate(Package.getPackageSummaries())]
     return jsonify({'data': projected_list}), 201
 
 # The API route to get all packages  
@@ -74,7 +75,7 @@ def newBooking():
     if check_in_date == '' or user_email == '' or hotel_name == '':
         return jsonify({"error": "Invalid data format"}), 400
 
-    print(f"Booking received for: {user_email}, Hotel: {hotel_name}, Check-in: {check_in_date}")
+    log.debug('Booking received for: %s, Hotel: %s, Check-in: %s', user_email, hotel_name, check_in_date)
     # You would typically save this data to a database or process the booking
 
     booking_user = User.getUser(email=user_email)
@@ -99,7 +100,7 @@ def manageBooking():
     
     booking_user = User.getUser(email=user_email)
     allBookings = Booking.getUserBookingsFromDate(booking_user, '1900-01-01')
-    sorted_data_desc = sorted(allBookings, key=lambda d: d['check_in_date'], reverse=True)
+    sorted_data_desc = allBookings.order_by('-check_in_date')
     dereferenced_data = Booking.dereferenceBookings(sorted_data_desc)
 
     return jsonify({"message": "Booking retrieved successfully",
@@ -1,4 +1,4 @@
-from flask import jsonify, request, Blueprint
+from flask import jsonify, request, Blueprint, Response, stream_with_context
 from app.utils.api_auth import api_auth
 from app.utils.api_review import ReviewAPI
 
@@ -22,7 +22,16 @@ def createReview():
 @api_review.route('/api/review/getAllReviews', methods=['POST'])
 @api_auth.login_required
 def getAllReviews():
-    success, response_data, status_code = ReviewAPI.get_all_reviews()
+    # Paging arguments are optional, so an empty or non-JSON body is fine here
+    data = request.get_json(silent=True) or request.form.to_dict()
+
+    if ReviewAPI.wants_stream(data):
+        success, response_data, status_code = ReviewAPI.stream_reviews(data)
+        if success:
+            return Response(stream_with_context(response_data), status=status_code, mimetype='application/x-ndjson')
+        return jsonify(response_data), status_code
+
+    success, response_data, status_code = ReviewAPI.get_all_reviews(data)
     return jsonify(response_data), status_code
 
 @api_review.route('/api/review/getReviewByBooking', methods=['POST'])
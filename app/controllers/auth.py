@@ -6,6 +6,9 @@ from flask import Blueprint, request, redirect, render_template, url_for, flash
 from app.models.forms import RegForm
 from app.models.users import User
 import os
+from app.utils.log import get_logger
+
+log = get_logger('auth')
 
 auth = Blueprint('auth', __name__)
 
@@ -28,7 +31,7 @@ def register():
 def login():
     form = RegForm()
     if request.method == 'POST':
-        print(request.form.get('checkbox'))
+        log.debug('login attempt, remember me: %s', request.form.get('checkbox'))
         if form.validate():
             check_user = User.getUser(email=form.email.data)
             if check_user:
@@ -8,6 +8,9 @@ from app.models.package import Package
 from app.models.book import Booking
 
 from datetime import date, timedelta
+from app.utils.log import get_logger
+
+log = get_logger('booking')
 
 booking = Blueprint('bookingController', __name__) # use bookingController.fn
 
@@ -18,7 +21,7 @@ def view():
     hotel_name=request.args.get('hotel_name').strip("'")
 
     the_package_to_be_booked = Package.getPackage(hotel_name=hotel_name)
-    print(the_package_to_be_booked)
+    log.debug('viewing package %s', hotel_name)
     return render_template('booking.html', panel=hotel_name, form=form, package=the_package_to_be_booked)
 
 
@@ -35,9 +38,9 @@ def book():
         # check_in_date in book 2023-03-28 <class 'str'>
 
         existing_package = Package.getPackage(hotel_name=hotel_name)
-        print(existing_package)
+        log.debug('booking package %s for %s', hotel_name, check_in_date)
         if (current_user is None) or (existing_package is None):
-            print(f"Something is wrong")
+            log.warning('cannot book unknown package %s', hotel_name)
         else:
             aBooking = Booking.createBooking(check_in_date, current_user, existing_package) 
             # print('aBooking.check_in_date', aBooking.check_in_date, type(aBooking.check_in_date)) # type is str
@@ -3,6 +3,7 @@ from flask_login import login_required, current_user
 from datetime import datetime, timedelta, date
 # from app import db
 from app.models.book import Booking
+from app.models.trend import HotelDailyCost
 
 dashboard = Blueprint('dashboard', __name__)
 
@@ -16,31 +17,26 @@ def trend_chart():
     
     elif request.method == 'POST':
         
-        #Chart is indexed by first date and last date
-        #And we are going to plot the period from 2021-01-17 to 2021-01-23
-
-        #Trend is reconstructed each time from Booking to incorporate new booking since the last trend chart
-
-        all_bookings = Booking.getAllBookings()
-        print(f"There are {len(all_bookings)} of booking records")
-        #TREND.objects.delete()
-
-        # hotel_costbyDate[hotel_name] = {date: accum_cost, ...}
-        hotel_costbyDate = {}
-
-        for aBooking in list(all_bookings):
-            hotel_name = aBooking.package.hotel_name
-            check_in_date = aBooking.check_in_date
-                      
-            if hotel_name not in hotel_costbyDate:
-                hotel_costbyDate[hotel_name] = {}
-            if check_in_date not in hotel_costbyDate[hotel_name]:
-                hotel_costbyDate[hotel_name][check_in_date] = 0
-            hotel_costbyDate[hotel_name][check_in_date] += aBooking.total_cost
-        
-        hotel_costbyDateSortedListValues = {}
-        for hotel, dateAmts in hotel_costbyDate.items():
-            hotel_costbyDateSortedListValues[hotel] = sorted(list(dateAmts.items()))
-
-        return jsonify({'chartDim': hotel_costbyDateSortedListValues, 'labels': []})    
-
+        #Chart is indexed by first date and last date: the page posts the visible
+        #window (from_date/to_date, 'YYYY-MM-DD', both optional) and a granularity
+        #of day/week/month, so only that series is aggregated and sent back
+        params = request.get_json(silent=True) or request.form
+        from_date = params.get('from_date') or None
+        to_date = params.get('to_date') or None
+        granularity = params.get('granularity') or 'day'
+        mode = params.get('mode') or 'rollup'
+
+        try:
+            if mode == 'aggregate':
+                #Aggregate straight from the booking collection on the server
+                hotel_costbyDateSortedListValues = Booking.costByHotelAndDate(from_date, to_date, granularity)
+            else:
+                #Trend is served from the daily rollup that Booking keeps up to date,
+                #so a refresh reads O(hotels x days) rows instead of every booking
+                #(use `flask trend rebuild` to backfill it from existing bookings)
+                hotel_costbyDateSortedListValues = HotelDailyCost.getTrend(from_date, to_date, granularity)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        # hotel_costbyDate[hotel_name] = [(date, accum_cost), ...] sorted by date
+        return jsonify({'chartDim': hotel_costbyDateSortedListValues, 'labels': []})
@@ -5,16 +5,23 @@ from app.models.forms import BookForm
 
 from app.models.users import User
 from app.models.package import Package
+from app.utils.http_cache import conditional, page_etag, CATALOGUE_MAX_AGE
+from app.utils.fragments import render_fragment
 
 package = Blueprint('packageController', __name__)
 
 @package.route('/')
 @package.route('/packages')
+@conditional(lambda: page_etag(Package.catalogueVersion()), max_age=CATALOGUE_MAX_AGE)
 def packages():
-    all_packages = Package.getAllPackages()
-    return render_template('packages.html', panel="Package", all_packages=all_packages)
+    # the grid is the same for every user; only base.html's header is rendered per request
+    package_grid = render_fragment(Package.catalogueVersion(), '_package_grid.html',
+                                   lambda: {'all_packages': Package.getAllPackages()})
+    return render_template('packages.html', panel="Package", package_grid=package_grid)
 
 @package.route("/viewPackageDetail/<hotel_name>")
+@conditional(lambda hotel_name: page_etag(Package.catalogueVersion()), max_age=CATALOGUE_MAX_AGE)
 def viewPackageDetail(hotel_name):
-    the_package = Package.getPackage(hotel_name=hotel_name)
-    return render_template('packageDetail.html', panel="Package Detail", package=the_package)
+    package_detail = render_fragment((Package.catalogueVersion(), hotel_name), '_package_detail.html',
+                                     lambda: {'package': Package.getPackage(hotel_name=hotel_name)})
+    return render_template('packageDetail.html', panel="Package Detail", package_detail=package_detail)
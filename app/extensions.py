@@ -1,7 +1,12 @@
 from flask_mongoengine import MongoEngine
 from flask_login import LoginManager
 from flask_cors import CORS, cross_origin
+from app.utils.monitoring import command_counter  # registers the pymongo command listener before any connection
+from app.utils.metrics import RequestMetrics
+from app.utils.profiler import QueryProfiler
 
 login_manager = LoginManager()
 db = MongoEngine()
+metrics = RequestMetrics()
+profiler = QueryProfiler()
 cors = CORS(resources={r"/api/*": {"origins": "*"}})
\ No newline at end of file
@@ -1,12 +1,21 @@
 from app.models.users import User
 from app.models.package import Package
+from app.models.trend import HotelDailyCost
+from app.config import read_only_preference
 # from app import db
 from mongoengine.queryset.visitor import Q
 from app.extensions import db
+from app.utils.dereference import reference_id, reference_map
 
 class Booking(db.Document):
     
-    meta = {'collection': 'booking'}
+    meta = {'collection': 'booking',
+            'indexes': [
+                # getBooking, and getUserBookingsFromDate through its customer+date prefix
+                ('customer', 'check_in_date', 'package'),
+                # date windows of the trend analytics
+                'check_in_date',
+            ]}
     check_in_date = db.DateTimeField(required=True)
     customer = db.ReferenceField(User)
     package = db.ReferenceField(Package)
@@ -29,8 +38,10 @@ class Booking(db.Document):
             
     @staticmethod
     def createBooking(check_in_date, customer, package):
-        booking = Booking(check_in_date=check_in_date, customer=customer, package=package).save()
-        booking.calculate_total_cost()
+        # total_cost comes from the package we already hold, so the booking is written with a single insert
+        booking = Booking(check_in_date=check_in_date, customer=customer, package=package,
+                          total_cost=package.packageCost()).save()
+        HotelDailyCost.addBooking(package.hotel_name, check_in_date, booking.total_cost)
         return booking
               
     @staticmethod
@@ -47,26 +58,69 @@ class Booking(db.Document):
     def updateBooking(old_check_in_date, new_check_in_date, customer, hotel_name):
         booking = Booking.getBooking(old_check_in_date, customer, hotel_name)
         if booking:
+            old_check_in_date = booking.check_in_date
             booking.check_in_date = new_check_in_date
-            return booking.save()
+            saved = booking.save()
+            HotelDailyCost.removeBooking(hotel_name, old_check_in_date, booking.total_cost)
+            HotelDailyCost.addBooking(hotel_name, new_check_in_date, booking.total_cost)
+            return saved
     
     @staticmethod
     def deleteBooking(check_in_date, customer, hotel_name):
         booking = Booking.getBooking(check_in_date, customer, hotel_name)
         if booking:
             booking.delete()
+            HotelDailyCost.removeBooking(hotel_name, booking.check_in_date, booking.total_cost)
         return booking
     
     # For the API branch to return JSON data
     @staticmethod
     def dereferenceBooking(booking):
-        return {
-            'check_in_date': booking.check_in_date,
-            'customer': booking.customer.email,
-            'package': booking.package.hotel_name,
-            'total_cost': booking.total_cost
-        }
+        return Booking.dereferenceBookings([booking])[0]
     
     @staticmethod
     def dereferenceBookings(bookings):
-        return [Booking.dereferenceBooking(booking) for booking in bookings]
\ No newline at end of file
+        # Resolve every customer and package with one $in query per collection instead of one fetch per row
+        bookings = list(bookings)
+        customers = reference_map(bookings, 'customer', User, 'email')
+        packages = reference_map(bookings, 'package', Package, 'hotel_name')
+        return [{
+            'check_in_date': booking.check_in_date,
+            'customer': customers.get(reference_id(booking, 'customer'), {}).get('email'),
+            'package': packages.get(reference_id(booking, 'package'), {}).get('hotel_name'),
+            'total_cost': booking.total_cost
+        } for booking in bookings]
+
+    # Analytics, aggregated by Mongo so only the series crosses the wire
+    @staticmethod
+    def costByHotelAndDate(from_date=None, to_date=None, granularity='day'):
+        """
+        Sum total_cost per hotel and per day/week/month of check-in.
+
+        Args:
+            from_date, to_date: optional inclusive check-in window (date, datetime or 'YYYY-MM-DD')
+            granularity (string): 'day', 'week' or 'month'
+
+        Returns:
+            dict: {hotel_name: [(period_start, total_cost), ...]} sorted by date
+        """
+        window = HotelDailyCost.dateWindow(from_date, to_date)
+        pipeline = [{'$match': {'check_in_date': window}}] if window else []
+        pipeline += [
+            # Group on the package reference first so $lookup runs once per bucket, not per booking
+            {'$group': {
+                '_id': {'package': '$package',
+                        'date': HotelDailyCost.dateBucket('$check_in_date', granularity)},
+                'total_cost': {'$sum': '$total_cost'}}},
+            {'$lookup': {'from': Package._get_collection_name(), 'localField': '_id.package',
+                         'foreignField': '_id', 'as': 'package'}},
+            {'$unwind': '$package'},
+            {'$group': {
+                '_id': {'hotel_name': '$package.hotel_name', 'date': '$_id.date'},
+                'total_cost': {'$sum': '$total_cost'}}},
+            {'$sort': {'_id.hotel_name': 1, '_id.date': 1}},
+        ]
+        hotel_costbyDate = {}
+        for row in Booking.objects.read_preference(read_only_preference()).aggregate(pipeline):
+            hotel_costbyDate.setdefault(row['_id']['hotel_name'], []).append((row['_id']['date'], row['total_cost']))
+        return hotel_costbyDate
\ No newline at end of file
@@ -0,0 +1,86 @@
+from app.extensions import db
+from datetime import datetime, timedelta
+from mongoengine.errors import ValidationError
+from mongoengine.queryset.visitor import Q
+
+JOB_STATUSES = ('queued', 'running', 'done', 'failed')
+
+class UploadJob(db.Document):
+    """A CSV upload waiting for, or processed by, the background worker (flask jobs worker)"""
+
+    meta = {'collection': 'uploadJobs',
+            'indexes': [('status', 'created')]}
+    datatype = db.StringField(required=True)
+    filename = db.StringField()
+    file = db.FileField()
+    submitted_by = db.StringField()
+    status = db.StringField(default='queued', choices=JOB_STATUSES)
+    created = db.DateTimeField(default=datetime.utcnow)
+    started = db.DateTimeField()
+    # heartbeat: set when the job is claimed and after every batch, so a job whose worker died can be reclaimed
+    updated = db.DateTimeField()
+    attempts = db.IntField(default=0)
+    finished = db.DateTimeField()
+    rows = db.IntField(default=0)
+    inserted = db.IntField(default=0)
+    failed = db.IntField(default=0)
+    errors = db.ListField(db.DictField())
+    message = db.StringField()
+
+    @staticmethod
+    def enqueue(datatype, file, submitted_by=None):
+        """Store the uploaded CSV in GridFS and queue it"""
+        job = UploadJob(datatype=datatype, filename=getattr(file, 'filename', None), submitted_by=submitted_by)
+        job.file.put(getattr(file, 'stream', file), content_type='text/csv')
+        return job.save()
+
+    @staticmethod
+    def getJob(job_id):
+        try:
+            return UploadJob.objects(pk=job_id).first()
+        except ValidationError:
+            return None
+
+    @staticmethod
+    def claimNext(stall_timeout):
+        """
+        Atomically take the oldest queued job, or a running one whose heartbeat is older than
+        stall_timeout seconds (its worker died), so several workers never process the same one
+        """
+        now = datetime.utcnow()
+        stalled = Q(status='running') & (Q(updated__lt=now - timedelta(seconds=stall_timeout)) | Q(updated=None))
+        return UploadJob.objects(Q(status='queued') | stalled).order_by('created').modify(
+            status='running', started=now, updated=now, inc__attempts=1, new=True)
+
+    def updateProgress(self, report):
+        self.update(set__rows=report.rows, set__inserted=report.inserted,
+                    set__failed=report.failed, set__errors=report.errors, set__updated=datetime.utcnow())
+
+    def complete(self, report):
+        # The CSV is no longer needed once ingested
+        self.file.delete()
+        self.update(set__rows=report.rows, set__inserted=report.inserted,
+                    set__failed=report.failed, set__errors=report.errors,
+                    set__status='done', set__finished=datetime.utcnow(), unset__file=True)
+
+    def fail(self, message):
+        # a failed upload is not retried (it is uploaded again), so its CSV is not kept either
+        if self.file:
+            self.file.delete()
+        self.update(set__status='failed', set__finished=datetime.utcnow(), set__message=message, unset__file=True)
+
+    def toStatus(self):
+        """The JSON shape returned by /upload/status/<job_id>"""
+        elapsed = ((self.finished or datetime.utcnow()) - self.started).total_seconds() if self.started else 0
+        return {
+            'id': str(self.id),
+            'datatype': self.datatype,
+            'filename': self.filename,
+            'status': self.status,
+            'rows': self.rows,
+            'inserted': self.inserted,
+            'failed': self.failed,
+            'rows_per_second': round(self.rows / elapsed, 1) if elapsed else 0,
+            'errors': self.errors,
+            'message': self.message,
+        }
@@ -1,8 +1,19 @@
 # from app import db
 from app.extensions import db
+from app.utils.cache import TTLCache
+from app.config import read_only_preference
+from app.utils.api import PACKAGE_KEYS
+from app.utils.http_cache import etag_of
+import os
+
+# Read-through cache of the catalogue, which changes rarely but is read on almost every request.
+# Holds raw rows, never Documents: every caller gets its own instance (as User.getSessionUser does).
+# Cleared on every package write; PACKAGE_CACHE_TTL (seconds, 0 to disable) bounds staleness across workers.
+package_cache = TTLCache(ttl=int(os.getenv('PACKAGE_CACHE_TTL', '300')))
 
 class Package(db.Document):
-    meta = {'collection': 'staycation'}
+    meta = {'collection': 'staycation',
+            'indexes': [{'fields': ['hotel_name'], 'unique': True}]}
     hotel_name = db.StringField(max_length=50)
     duration = db.IntField()
     unit_cost = db.FloatField()
@@ -14,12 +25,48 @@ class Package(db.Document):
     
     @staticmethod
     def getPackage(hotel_name):
-        return Package.objects(hotel_name=hotel_name).first()
+        # misses are not cached, so a package created by another worker (or an upload job) is found straight away
+        son = package_cache.get(('package', hotel_name))
+        if son is None:
+            son = Package.objects(hotel_name=hotel_name).as_pymongo().first()
+            if son is not None:
+                package_cache.set(('package', hotel_name), son)
+        # a fresh instance per call, so one request's changes never leak into another
+        return Package._from_son(son) if son else None
         
     @staticmethod
     def getAllPackages():
-        return Package.objects()
+        def load():
+            rows = list(Package.objects().read_preference(read_only_preference()).as_pymongo())
+            for son in rows:
+                package_cache.set(('package', son['hotel_name']), son)
+            return rows
+        return [Package._from_son(son) for son in package_cache.get_or_load('all', load)]
+
+    @staticmethod
+    def getPackageSummaries():
+        """All packages as plain dicts of the API fields, projected by Mongo and never built into Documents"""
+        return package_cache.get_or_load('summaries', lambda: list(
+            Package.objects().read_preference(read_only_preference())
+            .only(*PACKAGE_KEYS).exclude('id').as_pymongo()))
+
+    @staticmethod
+    def catalogueVersion():
+        """Hash of the catalogue content (HTTP ETags). Workers agree on it without sharing state"""
+        return package_cache.get_or_load('version', lambda: etag_of(Package.getPackageSummaries()))
         
     @staticmethod
     def createPackage(hotel_name, duration, unit_cost, image_url, description):
-        return Package(hotel_name=hotel_name, duration=duration, unit_cost=unit_cost, image_url=image_url, description=description).save()
\ No newline at end of file
+        package = Package(hotel_name=hotel_name, duration=duration, unit_cost=unit_cost, image_url=image_url, description=description).save()
+        Package.invalidateCache()
+        return package
+
+    @staticmethod
+    def invalidateCache():
+        """Forget every cached package, e.g. after the catalogue is changed"""
+        package_cache.invalidate()
+
+    @staticmethod
+    def cacheStats():
+        """Hit/miss counters of the package cache"""
+        return package_cache.stats()
@@ -0,0 +1,123 @@
+from app.extensions import db
+from app.models.package import Package
+from pymongo import UpdateOne
+
+# Ratings a review can have
+RATINGS = range(1, 6)
+
+class PackageRating(db.Document):
+    """Rating summary per package (count, sum, 1-5 histogram), kept up to date by Review"""
+
+    meta = {'collection': 'packageRatings',
+            'indexes': [{'fields': ['package'], 'unique': True}]}
+    package = db.ReferenceField(Package, required=True)
+    count = db.IntField(default=0)
+    total = db.IntField(default=0)
+    # number of reviews per rating, keyed '1'..'5' so a single $inc can create the key
+    histogram = db.DictField()
+
+    @staticmethod
+    def ratingUpdate(rating, count):
+        """The $inc document adding count reviews of the given rating"""
+        rating = int(rating)
+        return {'count': count, 'total': rating * count, f'histogram.{rating}': count}
+
+    @staticmethod
+    def addRating(package_id, rating, count=1):
+        """Count a review of a package, creating the summary if needed"""
+        PackageRating._get_collection().update_one(
+            {'package': package_id}, {'$inc': PackageRating.ratingUpdate(rating, count)}, upsert=True)
+
+    @staticmethod
+    def addRatings(ratings):
+        """Count many (package id, rating) reviews with a single bulk write"""
+        increments = {}
+        for package_id, rating in ratings:
+            inc = increments.setdefault(package_id, {})
+            for key, value in PackageRating.ratingUpdate(rating, 1).items():
+                inc[key] = inc.get(key, 0) + value
+        if increments:
+            PackageRating._get_collection().bulk_write([
+                UpdateOne({'package': package_id}, {'$inc': inc}, upsert=True)
+                for package_id, inc in increments.items()], ordered=False)
+
+    @staticmethod
+    def removeRating(package_id, rating):
+        """Take a deleted review out of its package's summary (left to reconcile when it has none)"""
+        PackageRating._get_collection().update_one(
+            {'package': package_id}, {'$inc': PackageRating.ratingUpdate(rating, -1)})
+
+    @staticmethod
+    def changeRating(package_id, old_rating, new_rating):
+        """Move an edited review from its old to its new rating"""
+        old_rating, new_rating = int(old_rating), int(new_rating)
+        if old_rating == new_rating:
+            return
+        PackageRating._get_collection().update_one({'package': package_id}, {'$inc': {
+            'total': new_rating - old_rating, f'histogram.{old_rating}': -1, f'histogram.{new_rating}': 1}})
+
+    @staticmethod
+    def toSummary(row):
+        """{'count', 'average', 'histogram': [reviews rated 1, ..., reviews rated 5]} of a stored row"""
+        row = row or {}
+        count = row.get('count', 0)
+        histogram = row.get('histogram', {})
+        return {'count': count,
+                'average': row.get('total', 0) / count if count > 0 else 0,
+                'histogram': [histogram.get(str(rating), 0) for rating in RATINGS]}
+
+    @staticmethod
+    def getSummary(package_id):
+        """Rating summary of one package, a single indexed read"""
+        row = PackageRating.objects(package=package_id).exclude('id').as_pymongo().first()
+        return PackageRating.toSummary(row)
+
+    @staticmethod
+    def getSummaries():
+        """{package id: rating summary} of every reviewed package, with one query"""
+        return {row['package']: PackageRating.toSummary(row) for row in PackageRating.objects().as_pymongo()}
+
+    @staticmethod
+    def difference(expected, stored):
+        """The $inc document turning the stored row into the expected one ({} when they agree)"""
+        expected, stored = expected or {}, stored or {}
+        inc = {key: expected.get(key, 0) - stored.get(key, 0) for key in ('count', 'total')}
+        expected_histogram, stored_histogram = expected.get('histogram', {}), stored.get('histogram', {})
+        for rating in set(expected_histogram) | set(stored_histogram):
+            inc[f'histogram.{rating}'] = expected_histogram.get(rating, 0) - stored_histogram.get(rating, 0)
+        return {key: value for key, value in inc.items() if value}
+
+    @staticmethod
+    def reconcile():
+        """
+        Recount every summary from the reviews and correct the ones that drifted (e.g. after
+        reviews were removed in bulk, or on first deploy). Returns the number of packages corrected.
+
+        Corrections are applied as $inc of the difference, so review writes landing after the
+        summaries were read are kept; a review written between the recount and that read can
+        still be counted twice or not at all, so run it while review writes are quiet.
+        """
+        from app.models.review import Review  # review.py imports this module
+        pipeline = [
+            {'$group': {'_id': {'package': '$package', 'rating': '$rating'}, 'n': {'$sum': 1}}},
+            {'$group': {'_id': '$_id.package',
+                        'count': {'$sum': '$n'},
+                        'total': {'$sum': {'$multiply': ['$_id.rating', '$n']}},
+                        'histogram': {'$push': {'k': {'$toString': '$_id.rating'}, 'v': '$n'}}}},
+        ]
+        expected = {row['_id']: {'package': row['_id'], 'count': row['count'], 'total': row['total'],
+                                 'histogram': {h['k']: h['v'] for h in row['histogram']}}
+                    for row in Review.objects.aggregate(pipeline)}
+        stored = {row['package']: row for row in PackageRating.objects().exclude('id').as_pymongo()}
+
+        corrected = 0
+        for package_id in set(expected) | set(stored):
+            inc = PackageRating.difference(expected.get(package_id), stored.get(package_id))
+            if inc:
+                PackageRating._get_collection().update_one({'package': package_id}, {'$inc': inc}, upsert=True)
+                corrected += 1
+        # summaries of packages without reviews, unless a review arrived meanwhile
+        stale = [package_id for package_id in stored if package_id not in expected]
+        if stale:
+            PackageRating._get_collection().delete_many({'package': {'$in': stale}, 'count': 0})
+        return corrected
@@ -1,13 +1,20 @@
 from app.models.users import User
 from app.models.package import Package
 from app.models.book import Booking
+from app.models.rating import PackageRating
 from mongoengine.queryset.visitor import Q
 from app.extensions import db
+from app.utils.dereference import reference_id, reference_map
 from datetime import datetime
 
 class Review(db.Document):
 
-    meta = {'collection': 'reviews'}
+    meta = {'collection': 'reviews',
+            'indexes': [
+                'booking',
+                ('package', 'customer'),
+                'customer',
+            ]}
     customer = db.ReferenceField(User, required=True)
     package = db.ReferenceField(Package, required=True)
     booking = db.ReferenceField(Booking) 
@@ -22,6 +29,15 @@ class Review(db.Document):
     def getAllReviews():
         """Get all reviews from the database"""
         return Review.objects()
+
+    @staticmethod
+    def getReviewsAfter(after=None, limit=None):
+        """Get reviews in _id order, starting after the review with id `after`"""
+        reviews = Review.objects(id__gt=after) if after else Review.objects()
+        reviews = reviews.order_by('id')
+        if limit:
+            reviews = reviews.limit(limit)
+        return reviews
     
     @staticmethod
     def getReviewByPackage(package):
@@ -36,12 +52,32 @@ class Review(db.Document):
         """Get a review by booking"""
         return Review.objects(booking=booking).first()
     
+    @staticmethod
+    def getBookingAndReview(check_in_date, customer_id, package_id):
+        """
+        Find a booking and its review with a single aggregation ($lookup from the booking)
+
+        Returns:
+            (booking, review), each None when not found
+        """
+        check_in_date = Booking.check_in_date.prepare_query_value(None, check_in_date)
+        pipeline = [
+            {'$match': {'customer': customer_id, 'package': package_id, 'check_in_date': check_in_date}},
+            {'$limit': 1},
+            {'$lookup': {'from': Review._get_collection_name(), 'localField': '_id',
+                         'foreignField': 'booking', 'as': 'reviews'}},
+        ]
+        for row in Booking.objects.aggregate(pipeline):
+            reviews = row.pop('reviews')
+            return Booking._from_son(row), Review._from_son(reviews[0]) if reviews else None
+        return None, None
+
     @staticmethod
     def getPackageAverageRating(package):
-        """Get the average rating of a package"""
-        reviews = Review.getReviewByPackage(package)
-        if reviews:
-            return sum(review.rating for review in reviews) / len(reviews)
+        """Get the average rating of a package, from its maintained rating summary"""
+        package = Package.getPackage(package)
+        if package:
+            return PackageRating.getSummary(package.pk)['average']
         return 0
     
     @staticmethod
@@ -69,13 +105,15 @@ class Review(db.Document):
             comment=comment
         )
         new_review.save()
+        PackageRating.addRating(reference_id(new_review, 'package'), new_review.rating)
         return new_review
 
     @staticmethod
-    def updateReview(customer, package, new_date, new_rating, new_comment, new_image_url, new_suggested_theme, new_title ):
-        """Update a review"""
-        review = Review.getReview(customer, package)
+    def updateReview(customer, package, new_date, new_rating, new_comment, new_image_url, new_suggested_theme, new_title, review=None):
+        """Update a review (the given one, else the customer's review of the package)"""
+        review = review or Review.getReview(customer, package)
         if review:
+            old_rating = review.rating
             review.date = new_date
             review.rating = new_rating
             review.title = new_title
@@ -83,33 +121,38 @@ class Review(db.Document):
             review.image_url = new_image_url
             review.suggested_theme = new_suggested_theme
             review.save()
+            PackageRating.changeRating(reference_id(review, 'package'), old_rating, review.rating)
             return review
         return None
     
     @staticmethod
-    def deleteReview(customer, package):
-        """Delete a review"""
-        review = Review.getReview(customer, package)
+    def deleteReview(customer, package, review=None):
+        """Delete a review (the given one, else the customer's review of the package)"""
+        review = review or Review.getReview(customer, package)
         if review:
             review.delete()
+            PackageRating.removeRating(reference_id(review, 'package'), review.rating)
             return True
         return False
     
     # For the API branch to return JSON data
     @staticmethod
     def dereferenceReview(review):
-        return {
+        return Review.dereferenceReviews([review])[0]
+    
+    @staticmethod
+    def dereferenceReviews(reviews):
+        # Resolve every customer and package with one $in query per collection instead of one fetch per row
+        reviews = list(reviews)
+        customers = reference_map(reviews, 'customer', User, 'email')
+        packages = reference_map(reviews, 'package', Package, 'hotel_name')
+        return [{
             'date': review.date,
-            'customer': review.customer.email,
-            'package': review.package.hotel_name,
+            'customer': customers.get(reference_id(review, 'customer'), {}).get('email'),
+            'package': packages.get(reference_id(review, 'package'), {}).get('hotel_name'),
             'rating': review.rating,
             'title': review.title,
             'comment': review.comment,
             'image_url': review.image_url,
             'suggested_theme': review.suggested_theme
-        }
-    
-    @staticmethod
-    def dereferenceReviews(reviews):
-        return [Review.dereferenceReview(review) for review in reviews]
-    
\ No newline at end of file
+        } for review in reviews]
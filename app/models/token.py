@@ -1,19 +1,55 @@
 # from app import db
 from app.extensions import db
+from app.utils.cache import TTLCache
+import os
+
+# email -> token, so API authentication does not query Mongo on every request.
+# Only existing tokens are cached, so a token created in another worker is found straight away.
+# Entries are evicted when a token is revoked through revokeToken / delete() in this worker;
+# TOKEN_CACHE_TTL (seconds) bounds how long a token revoked elsewhere, or with a bulk
+# UserTokens.objects(...).delete() (which skips delete()), keeps authenticating.
+token_cache = TTLCache(ttl=int(os.getenv('TOKEN_CACHE_TTL', '60')), maxsize=int(os.getenv('TOKEN_CACHE_SIZE', '1024')))
 
 class UserTokens(db.Document):
     
-    meta = {'collection': 'tokens'}
+    meta = {'collection': 'tokens',
+            'indexes': [{'fields': ['email'], 'unique': True}]}
     email = db.StringField(max_length=30)
     token = db.StringField()
     
     @staticmethod
     def getToken(email):
         return UserTokens.objects(email=email).first()
+
+    @staticmethod
+    def getCachedToken(email):
+        """Return the token string for email (None if there is none), from the cache when possible"""
+        token = token_cache.get(email)
+        if token is None:
+            userToken = UserTokens.objects(email=email).only('token').first()
+            token = userToken.token if userToken else None
+            if token is not None:
+                token_cache.set(email, token)
+        return token
     
     @staticmethod 
     def createToken(email, token):
         userToken = UserTokens.getToken(email)
         if not userToken:
             userToken = UserTokens(email=email, token=token).save()
+            token_cache.invalidate(email)
         return token  
+
+    @staticmethod
+    def revokeToken(email):
+        """Delete the token of email, if any. Returns True when a token was revoked"""
+        userToken = UserTokens.getToken(email)
+        if userToken:
+            userToken.delete()
+            return True
+        return False
+
+    def delete(self, *args, **kwargs):
+        # Make sure a revoked token stops authenticating straight away in this worker
+        token_cache.invalidate(self.email)
+        return super().delete(*args, **kwargs)
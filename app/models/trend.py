@@ -0,0 +1,120 @@
+from app.extensions import db
+from pymongo import UpdateOne
+from app.config import read_only_preference
+from app.models.package import Package
+from datetime import datetime, date, timedelta
+
+# Bucket sizes accepted by the trend/analytics queries (units of Mongo's $dateTrunc)
+GRANULARITIES = ('day', 'week', 'month')
+
+class HotelDailyCost(db.Document):
+    """Daily rollup of booking cost per hotel, kept up to date by Booking"""
+
+    meta = {'collection': 'trendDaily',
+            'indexes': [{'fields': ['hotel_name', 'check_in_date'], 'unique': True}]}
+    hotel_name = db.StringField(max_length=50, required=True)
+    check_in_date = db.DateTimeField(required=True)
+    total_cost = db.FloatField(default=0)
+    count = db.IntField(default=0)
+
+    @staticmethod
+    def toDay(check_in_date):
+        """Truncate a check-in date (datetime, date or 'YYYY-MM-DD' string) to midnight"""
+        if isinstance(check_in_date, str):
+            check_in_date = datetime.fromisoformat(check_in_date.strip()[:10])
+        if isinstance(check_in_date, date):
+            return datetime(check_in_date.year, check_in_date.month, check_in_date.day)
+        return check_in_date
+
+    @staticmethod
+    def dateWindow(from_date=None, to_date=None):
+        """Build a $match condition for check-in dates in [from_date, to_date], both optional and inclusive"""
+        window = {}
+        if from_date:
+            window['$gte'] = HotelDailyCost.toDay(from_date)
+        if to_date:
+            window['$lt'] = HotelDailyCost.toDay(to_date) + timedelta(days=1)
+        return window
+
+    @staticmethod
+    def dateBucket(field, granularity):
+        """Build the aggregation expression truncating a date field to the start of its day/week/month"""
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"granularity must be one of {', '.join(GRANULARITIES)}")
+        return {'$dateTrunc': {'date': field, 'unit': granularity, 'startOfWeek': 'monday'}}
+
+    @staticmethod
+    def addBooking(hotel_name, check_in_date, total_cost, count=1):
+        """Add a booking's cost to its hotel/day bucket, creating the bucket if needed"""
+        HotelDailyCost.objects(hotel_name=hotel_name, check_in_date=HotelDailyCost.toDay(check_in_date)).update_one(
+            inc__total_cost=total_cost or 0, inc__count=count, upsert=True)
+
+    @staticmethod
+    def addBookings(bookings):
+        """Add many (hotel_name, check_in_date, total_cost) bookings with a single bulk write"""
+        buckets = {}
+        for hotel_name, check_in_date, total_cost in bookings:
+            key = (hotel_name, HotelDailyCost.toDay(check_in_date))
+            cost, count = buckets.get(key, (0, 0))
+            buckets[key] = (cost + (total_cost or 0), count + 1)
+        if buckets:
+            HotelDailyCost._get_collection().bulk_write([
+                UpdateOne({'hotel_name': hotel_name, 'check_in_date': day},
+                          {'$inc': {'total_cost': cost, 'count': count}}, upsert=True)
+                for (hotel_name, day), (cost, count) in buckets.items()], ordered=False)
+
+    @staticmethod
+    def removeBooking(hotel_name, check_in_date, total_cost):
+        """Take a booking's cost out of its hotel/day bucket and drop the bucket once empty"""
+        day = HotelDailyCost.toDay(check_in_date)
+        HotelDailyCost.addBooking(hotel_name, day, -(total_cost or 0), count=-1)
+        HotelDailyCost.objects(hotel_name=hotel_name, check_in_date=day, count__lte=0).delete()
+
+    @staticmethod
+    def getTrend(from_date=None, to_date=None, granularity='day'):
+        """Return {hotel_name: [(period_start, total_cost), ...]} sorted by date"""
+        window = HotelDailyCost.dateWindow(from_date, to_date)
+        pipeline = [{'$match': {'check_in_date': window}}] if window else []
+        pipeline += [
+            {'$group': {
+                # rows are already one per hotel and day, so days need no $dateTrunc
+                '_id': {'hotel_name': '$hotel_name',
+                        'date': '$check_in_date' if granularity == 'day'
+                                else HotelDailyCost.dateBucket('$check_in_date', granularity)},
+                'total_cost': {'$sum': '$total_cost'}}},
+            {'$sort': {'_id.hotel_name': 1, '_id.date': 1}},
+        ]
+        hotel_costbyDate = {}
+        for row in HotelDailyCost.objects.read_preference(read_only_preference()).aggregate(pipeline):
+            hotel_costbyDate.setdefault(row['_id']['hotel_name'], []).append((row['_id']['date'], row['total_cost']))
+        return hotel_costbyDate
+
+    @staticmethod
+    def rebuild():
+        """
+        Recompute the whole rollup from the booking collection, server side. Returns the number of rows.
+
+        $out replaces the collection wholesale, so bookings written while the aggregation runs are
+        lost from the rollup: run it while bookings are not being written.
+        """
+        from app.models.book import Booking  # book.py imports this module
+        pipeline = [
+            {'$group': {
+                '_id': {'package': '$package',
+                        'day': HotelDailyCost.dateBucket('$check_in_date', 'day')},
+                'total_cost': {'$sum': '$total_cost'},
+                'count': {'$sum': 1}}},
+            {'$lookup': {'from': Package._get_collection_name(), 'localField': '_id.package',
+                         'foreignField': '_id', 'as': 'package'}},
+            {'$unwind': '$package'},
+            {'$group': {
+                '_id': {'hotel_name': '$package.hotel_name', 'check_in_date': '$_id.day'},
+                'total_cost': {'$sum': '$total_cost'},
+                'count': {'$sum': '$count'}}},
+            {'$project': {'_id': 0, 'hotel_name': '$_id.hotel_name', 'check_in_date': '$_id.check_in_date',
+                          'total_cost': 1, 'count': 1}},
+            {'$out': HotelDailyCost._get_collection_name()},
+        ]
+        list(Booking.objects.aggregate(pipeline))
+        HotelDailyCost.ensure_indexes()
+        return HotelDailyCost.objects.count()
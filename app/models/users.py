@@ -1,10 +1,19 @@
 # from app import db
 from flask_login import UserMixin
 from app.extensions import db
+from app.utils.cache import TTLCache
+import os
+
+# Compact copies of logged-in users, so Flask-Login does not fetch the user on every page view.
+# Cleared when the user is saved or deleted; USER_CACHE_TTL (seconds) bounds staleness across workers.
+user_cache = TTLCache(ttl=int(os.getenv('USER_CACHE_TTL', '30')), maxsize=int(os.getenv('USER_CACHE_SIZE', '10000')))
+# The fields kept for a session user (never the password hash)
+SESSION_FIELDS = ('email', 'name', 'avatar')
 
 class User(UserMixin, db.Document):
     
-    meta = {'collection': 'appUsers'}
+    meta = {'collection': 'appUsers',
+            'indexes': [{'fields': ['email'], 'unique': True}]}
     email = db.StringField(max_length=30)
     password = db.StringField()
     name = db.StringField()
@@ -17,6 +26,30 @@ class User(UserMixin, db.Document):
     @staticmethod
     def getUserById(user_id):
         return User.objects(pk=user_id).first()
+
+    @staticmethod
+    def getUserId(email, cached=True):
+        """
+        The id of the user with this email, or None. Cached: a user deleted in bulk or by another
+        worker and registered again keeps its old id here for up to USER_CACHE_TTL seconds,
+        so callers that find nothing under a cached id should check again with cached=False
+        """
+        user_id = user_cache.get(('id', email)) if cached else None
+        if user_id is None:
+            user_id = User.objects(email=email).scalar('id').first()
+            if user_id is not None:
+                user_cache.set(('id', email), user_id)
+            else:
+                user_cache.invalidate(('id', email))
+        return user_id
+
+    @staticmethod
+    def getSessionUser(user_id):
+        """Load the logged-in user from a cached copy of its session fields"""
+        son = user_cache.get_or_load(str(user_id),
+            lambda: User.objects(pk=user_id).only(*SESSION_FIELDS).as_pymongo().first())
+        # a fresh instance per request, so one request's changes never leak into another
+        return User._from_son(son) if son else None
     
     @staticmethod 
     def createUser(email, name, password):
@@ -30,5 +63,16 @@ class User(UserMixin, db.Document):
         user.avatar = filename
         user.save()
 
+    def save(self, *args, **kwargs):
+        saved = super().save(*args, **kwargs)
+        user_cache.invalidate(str(self.pk))
+        user_cache.invalidate(('id', self.email))
+        return saved
+
+    def delete(self, *args, **kwargs):
+        user_cache.invalidate(str(self.pk))
+        user_cache.invalidate(('id', self.email))
+        return super().delete(*args, **kwargs)
+
 
 
@@ -1,11 +1,9 @@
 # https://medium.com/@dmitryrastorguev/basic-user-authentication-login-for-flask-using-mongoengine-and-wtforms-922e64ef87fe
 
 from flask_login import login_required, current_user
-from flask import Blueprint, render_template, request, jsonify, url_for, redirect
+from flask import Blueprint, render_template, request, jsonify, url_for
 # from app import app, db #, login_manager
 
-from werkzeug.security import generate_password_hash
-
 # # Register Blueprint so we can factor routes
 # # from bmi import bmi, get_dict_from_csv, insert_reading_data_into_database
 
@@ -16,16 +14,14 @@ from werkzeug.security import generate_password_hash
 # from controllers.api import api
 
 from app.models.package import Package
-from app.models.book import Booking
 from app.models.users import User
-from app.models.forms import BookForm
+from app.models.job import UploadJob
+from app.utils.ingest import INGESTERS
 
-#for uploading file
-import csv
-import io
-import json
-import datetime as dt
 import os
+from app.utils.log import get_logger
+
+log = get_logger('main')
 
 main = Blueprint("main", __name__)
 
@@ -45,35 +41,31 @@ def upload():
         return render_template("upload.html", name=current_user.name, panel="Upload")
     elif request.method == 'POST':
         type = request.form.get('type')
+        job = None
         if type == 'create':
-            print("No create Action yet")
+            log.info('No create Action yet')
         elif type == 'upload':
             file = request.files.get('file')
             datatype = request.form.get('datatype')
 
-            data = file.read().decode('utf-8')
-            dict_reader = csv.DictReader(io.StringIO(data), delimiter=',', quotechar='"')
+            # The CSV is queued for the background worker (flask jobs worker),
+            # the page then polls /upload/status/<job_id>
+            if datatype in INGESTERS:
+                job = UploadJob.enqueue(datatype, file, submitted_by=current_user.email).toStatus()
             file.close()
-
-            if datatype == "Users":
-                for item in list(dict_reader):
-                    pwd = generate_password_hash(item['password'], method='sha256')
-                    User.createUser(email=item['email'], password=pwd, name=item['name'])
-            elif datatype == "Package":
-                for item in list(dict_reader):
-                    Package.createPackage(hotel_name=item['hotel_name'], duration=int(item['duration']),
-                        unit_cost=float(item['unit_cost']), image_url=item['image_url'],
-                        description=item['description'])
-            elif datatype == "Booking":
-                for item in list(dict_reader):
-                    existing_user = User.getUser(email=item['customer'])
-                    existing_package = Package.getPackage(hotel_name=item['hotel_name'])
-                    check_in_date=dt.datetime.strptime(item['check_in_date'], "%Y-%m-%d")
-
-                    aBooking = Booking.createBooking(check_in_date=check_in_date, customer=existing_user, package=existing_package)
-                    aBooking.calculate_total_cost()
                     
-        return render_template("upload.html", panel="Upload")
+        return render_template("upload.html", panel="Upload", job=job)
+
+@main.route("/upload/status/<job_id>")
+@login_required
+def uploadStatus(job_id):
+    job = UploadJob.getJob(job_id)
+    if job is None:
+        return jsonify({'error': 'No such upload job'}), 404
+    if job.status == 'done' and job.datatype == 'Package':
+        # the worker ran in another process, so this one's catalogue cache is stale
+        Package.invalidateCache()
+    return jsonify(job.toStatus())
     
 @main.route("/changeAvatar")
 def changeAvatar():
@@ -95,7 +87,7 @@ def changeAvatar():
 def chooseAvatar():
     # get the filename
     chosenPath = request.json['path']
-    print('chosen path: ', chosenPath)
+    log.debug('chosen avatar path %s', chosenPath)
   
     basedir = os.path.abspath(os.path.dirname(__file__))
 
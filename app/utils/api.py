@@ -1,3 +1,6 @@
+# The package fields exposed by the API, in response order
+PACKAGE_KEYS = ("hotel_name", "image_url", "description", "unit_cost", "duration")
+
 def extract_keys(dictionary, running_id=1):
     """
     Extracts specific keys from a dictionary and adds an "id" key with a running number.
@@ -11,7 +14,7 @@ def extract_keys(dictionary, running_id=1):
     """
     extracted_data = {
         key: dictionary[key]
-        for key in ["hotel_name", "image_url", "description", "unit_cost", "duration"]
+        for key in PACKAGE_KEYS
         if key in dictionary
     }
     extracted_data["id"] = running_id
@@ -1,6 +1,7 @@
 from flask_httpauth import HTTPBasicAuth
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
+import hmac
 from app.models.users import User
 from app.models.token import UserTokens
 
@@ -11,19 +12,15 @@ def verify_password(email, token):
     """
     Verify password for HTTP Basic Auth.
     This function is used by Flask-HTTPAuth to authenticate API requests.
+    The stored token comes from a short-lived cache and is compared in constant time.
     """
-    print(f"verify_password called with email: {email}")
-    print(f"Token received: {token}")
-    
-    user_token = UserTokens.getToken(email=email)
-    print(f"User token from DB: {user_token.token if user_token and user_token.token else 'No token found'}")
-    
-    if user_token and user_token.token == token:
-        print(f"Authentication successful for {email}")
-        return True
-    else:
-        print(f"Authentication failed for {email}")
+    if not email or not token:
+        return False
+
+    user_token = UserTokens.getCachedToken(email=email)
+    if user_token is None:
         return False
+    return hmac.compare_digest(user_token.encode('utf-8'), token.encode('utf-8'))
 
 def generate_user_token(email, password):
     """
@@ -1,11 +1,60 @@
-from flask import jsonify, request
+from flask import jsonify, request, current_app
+from bson import ObjectId
+import base64
 from app.models.users import User
 from app.models.package import Package
-from app.models.book import Booking
 from app.models.review import Review
+from app.utils.log import get_logger
+
+log = get_logger('api_review')
 
 class ReviewAPI:
     """Service layer for Review API"""
+
+    PAGE_LIMIT = 100        # reviews per page when no limit is given
+    MAX_PAGE_LIMIT = 1000   # upper bound on the limit a client may ask for
+    STREAM_BATCH_SIZE = 200 # reviews dereferenced together while streaming
+
+    @staticmethod
+    def encode_cursor(review_id):
+        """Turn a review id into the opaque 'after' token returned to clients"""
+        return base64.urlsafe_b64encode(str(review_id).encode()).decode()
+
+    @staticmethod
+    def decode_cursor(token):
+        """Turn an 'after' token back into a review id, raising ValueError if it is not one of ours"""
+        try:
+            return ObjectId(base64.urlsafe_b64decode(token.encode()).decode())
+        except Exception:
+            raise ValueError("Invalid cursor")
+
+    @staticmethod
+    def parse_page_args(data, default_limit):
+        """
+        Read the 'after' cursor and 'limit' from request data
+
+        Returns:
+            tuple: (after: ObjectId or None, limit: int or None)
+        """
+        after = data.get("after")
+        after = ReviewAPI.decode_cursor(after) if after else None
+        limit = data.get("limit") or default_limit
+        if limit is not None:
+            try:
+                limit = int(limit)
+            except (TypeError, ValueError):
+                raise ValueError("limit must be a number")
+            if limit < 1:
+                raise ValueError("limit must be at least 1")
+            limit = min(limit, ReviewAPI.MAX_PAGE_LIMIT)
+        return after, limit
+
+    @staticmethod
+    def wants_stream(data):
+        """True when the client asked for an NDJSON stream rather than a JSON page"""
+        if str(data.get("stream", "")).lower() in ("1", "true", "yes"):
+            return True
+        return "application/x-ndjson" in request.headers.get("Accept", "")
     
     @staticmethod
     def get_authenticated_user_email():
@@ -18,10 +67,50 @@ class ReviewAPI:
             if request.authorization and request.authorization.username:
                 return request.authorization.username
         except Exception as e:
-            print(f"Error getting authenticated user email: {e}")
+            log.warning('Error getting authenticated user email: %s', e)
             return None
         return None
     
+    @staticmethod
+    def resolve_review_context(user_email, hotel_name, check_in_date):
+        """
+        Resolve the customer, package, booking and review that a review request refers to.
+
+        The user id and the package come from in-process caches and the booking is fetched
+        together with its review, so this is usually a single round-trip. When no booking is
+        found the user id is checked again without the cache.
+
+        Args:
+            user_email, hotel_name, check_in_date: identify the booking
+
+        Returns:
+            tuple: (context: dict with customer, package, booking and review (or None), or None;
+                    error: (False, response_data, 404) saying what was not found, or None)
+        """
+        customer_id = User.getUserId(user_email)
+        if customer_id is None:
+            return None, (False, {"error": "User not found"}, 404)
+
+        package = Package.getPackage(hotel_name=hotel_name)
+        if not package:
+            return None, (False, {"error": "Package not found"}, 404)
+
+        booking, review = Review.getBookingAndReview(check_in_date, customer_id, package.pk)
+        if not booking:
+            # the cached id may belong to a deleted account that was registered again
+            fresh_id = User.getUserId(user_email, cached=False)
+            if fresh_id is None:
+                return None, (False, {"error": "User not found"}, 404)
+            if fresh_id != customer_id:
+                customer_id = fresh_id
+                booking, review = Review.getBookingAndReview(check_in_date, customer_id, package.pk)
+        if not booking:
+            return None, (False, {"error": "Booking not found"}, 404)
+
+        # enough of the user to reference it and to dereference the review's customer
+        customer = User._from_son({'_id': customer_id, 'email': user_email})
+        return {"customer": customer, "package": package, "booking": booking, "review": review}, None
+
     @staticmethod
     def create_review(data):
         """
@@ -47,28 +136,19 @@ class ReviewAPI:
             if not all([hotel_name, rating, title, comment, check_in_date]):
                 return False, {"error": "Missing required fields"}, 400
 
-            # Retrieve the relevant user, package and booking objects to create the review
-            customer = User.getUser(email=user_email)
-            if not customer:
-                return False, {"error": "User not found"}, 404
-
-            package = Package.getPackage(hotel_name=hotel_name)
-            if not package:
-                return False, {"error": "Package not found"}, 404
-
-            booking = Booking.getBooking(check_in_date, customer, hotel_name)
-            if not booking:
-                return False, {"error": "Booking not found"}, 404
+            # Retrieve the relevant user, package, booking and any existing review in one go
+            context, error = ReviewAPI.resolve_review_context(user_email, hotel_name, check_in_date)
+            if error:
+                return error
 
             # Check if review already exists for this booking
-            existing_review = Review.objects(booking=booking).first()
-            if existing_review:
+            if context["review"]:
                 return False, {"error": "Review already exists for this booking"}, 409
 
             new_review = Review.createReview(
-                customer=customer,
-                package=package,
-                booking=booking,
+                customer=context["customer"],
+                package=context["package"],
+                booking=context["booking"],
                 rating=int(rating),
                 title=title,
                 comment=comment
@@ -85,24 +165,69 @@ class ReviewAPI:
             return False, {"error": "Failed to create review"}, 500
 
     @staticmethod
-    def get_all_reviews():
+    def get_all_reviews(data=None):
         """
-        Retrieve all reviews
+        Retrieve one page of reviews
         
+        Args:
+            data (dict): Optional 'after' cursor (from a previous page's 'next') and 'limit'
+
         Returns:
             tuple: (success: bool, response_data: dict, status_code: int)
         """
         try:
-            all_reviews = Review.getAllReviews()
-            dereferenced_reviews = Review.dereferenceReviews(all_reviews)
+            after, limit = ReviewAPI.parse_page_args(data or {}, ReviewAPI.PAGE_LIMIT)
+        except ValueError as e:
+            return False, {"error": str(e)}, 400
+
+        try:
+            # Fetch one extra review to know whether there is a next page
+            page = list(Review.getReviewsAfter(after, limit + 1))
+            has_more = len(page) > limit
+            page = page[:limit]
+            dereferenced_reviews = Review.dereferenceReviews(page)
             
             return True, {
                 "message": "Reviews retrieved successfully",
-                "data": dereferenced_reviews
+                "data": dereferenced_reviews,
+                "next": ReviewAPI.encode_cursor(page[-1].id) if has_more else None
             }, 200
         except Exception as e:
             return False, {"error": "Failed to retrieve reviews"}, 500
 
+    @staticmethod
+    def stream_reviews(data=None):
+        """
+        Stream reviews as NDJSON, one line per review, straight from the Mongo cursor
+        
+        Args:
+            data (dict): Optional 'after' cursor and 'limit' (no limit streams every remaining review)
+
+        Returns:
+            tuple: (success: bool, response_data: generator of str or error dict, status_code: int)
+        """
+        try:
+            after, limit = ReviewAPI.parse_page_args(data or {}, None)
+        except ValueError as e:
+            return False, {"error": str(e)}, 400
+
+        def generate():
+            batch = []
+            for review in Review.getReviewsAfter(after, limit).batch_size(ReviewAPI.STREAM_BATCH_SIZE):
+                batch.append(review)
+                if len(batch) == ReviewAPI.STREAM_BATCH_SIZE:
+                    yield ReviewAPI._ndjson_lines(batch)
+                    batch = []
+            if batch:
+                yield ReviewAPI._ndjson_lines(batch)
+
+        return True, generate(), 200
+
+    @staticmethod
+    def _ndjson_lines(reviews):
+        """Dereference a batch of reviews and render it as NDJSON"""
+        return "".join(current_app.json.dumps(review) + "\n" for review in Review.dereferenceReviews(reviews))
+
     @staticmethod
     def get_review_by_booking(data):
         """
@@ -123,15 +248,11 @@ class ReviewAPI:
             if not all([user_email, hotel_name, check_in_date]):
                 return False, {"error": "Missing required fields"}, 400
 
-            customer = User.getUser(email=user_email)
-            if not customer:
-                return False, {"error": "User not found"}, 404
-
-            booking = Booking.getBooking(hotel_name=hotel_name, customer=customer, check_in_date=check_in_date)
-            if not booking:
-                return False, {"error": "Booking not found"}, 404
+            context, error = ReviewAPI.resolve_review_context(user_email, hotel_name, check_in_date)
+            if error:
+                return error
 
-            review = Review.getReviewByBooking(booking)
+            review = context["review"]
             if not review:
                 return False, {"error": "Review not found for this booking"}, 404
 
@@ -170,32 +291,25 @@ class ReviewAPI:
             if not all([hotel_name, check_in_date]):
                 return False, {"error": "Missing required fields"}, 400
 
-            customer = User.getUser(email=user_email)
-            if not customer:
-                return False, {"error": "User not found"}, 404
-
-            package = Package.getPackage(hotel_name=hotel_name)
-            if not package:
-                return False, {"error": "Package not found"}, 404
+            context, error = ReviewAPI.resolve_review_context(user_email, hotel_name, check_in_date)
+            if error:
+                return error
 
-            booking = Booking.getBooking(check_in_date, customer, hotel_name)
-            if not booking:
-                return False, {"error": "Booking not found"}, 404
-
-            review = Review.getReviewByBooking(booking)
+            review = context["review"]
             if not review:
                 return False, {"error": "Review not found for this booking"}, 404
 
             # Perform update
             updated_review = Review.updateReview(
-                customer=customer,
-                package=package,
+                customer=context["customer"],
+                package=context["package"],
                 new_date=review.date,  # Check-in date should still remain the same, hence use original date
                 new_rating=int(new_rating) if new_rating else review.rating,
                 new_comment=new_comment if new_comment else review.comment,
                 new_image_url=new_image_url if new_image_url else review.image_url,
                 new_suggested_theme=new_suggested_theme if new_suggested_theme else review.suggested_theme,
-                new_title=new_title if new_title else review.title
+                new_title=new_title if new_title else review.title,
+                review=review
             )
 
             if updated_review:
@@ -231,23 +345,15 @@ class ReviewAPI:
             if not all([hotel_name, check_in_date]):
                 return False, {"error": "Missing required fields"}, 400
 
-            customer = User.getUser(email=user_email)
-            if not customer:
-                return False, {"error": "User not found"}, 404
-
-            package = Package.getPackage(hotel_name=hotel_name)
-            if not package:
-                return False, {"error": "Package not found"}, 404
-
-            booking = Booking.getBooking(check_in_date, customer, hotel_name)
-            if not booking:
-                return False, {"error": "Booking not found"}, 404
+            context, error = ReviewAPI.resolve_review_context(user_email, hotel_name, check_in_date)
+            if error:
+                return error
 
-            review = Review.getReviewByBooking(booking)
+            review = context["review"]
             if not review:
                 return False, {"error": "Review not found for this booking"}, 404
 
-            success = Review.deleteReview(customer=customer, package=package)
+            success = Review.deleteReview(customer=context["customer"], package=context["package"], review=review)
             if success:
                 return True, {"message": "Review deleted successfully"}, 200
             else:
@@ -0,0 +1,49 @@
+from bson import DBRef
+
+def reference_id(document, field):
+    """
+    Return the id held by a ReferenceField without fetching the referenced document.
+
+    Args:
+        document: A MongoEngine document.
+        field: Name of the ReferenceField.
+
+    Returns:
+        The referenced ObjectId, or None if the field is empty.
+    """
+    value = document._data.get(field)
+    if isinstance(value, DBRef):
+        return value.id
+    if hasattr(value, 'pk'):
+        return value.pk
+    return value
+
+def reference_map(documents, field, model, *fields):
+    """
+    Resolve one ReferenceField across many documents with a single $in query.
+
+    References that are already loaded are reused; the rest are fetched together,
+    projected on the requested fields.
+
+    Args:
+        documents: The documents holding the reference.
+        field: Name of the ReferenceField.
+        model: The referenced document class.
+        fields: The fields of the referenced documents to keep.
+
+    Returns:
+        A dictionary {referenced id: {field: value, ...}}.
+    """
+    resolved = {}
+    missing = set()
+    for document in documents:
+        value = document._data.get(field)
+        if isinstance(value, model):
+            resolved[value.pk] = {key: getattr(value, key) for key in fields}
+        elif value is not None:
+            missing.add(reference_id(document, field))
+    missing.difference_update(resolved)
+    if missing:
+        for row in model.objects(pk__in=list(missing)).only(*fields).as_pymongo():
+            resolved[row['_id']] = row
+    return resolved
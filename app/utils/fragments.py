@@ -0,0 +1,24 @@
+import os
+from flask import render_template
+from markupsafe import Markup
+from app.utils.cache import TTLCache
+
+# Rendered HTML of templates that do not depend on the user (package grid, package detail body).
+# Keys carry the catalogue version, so a changed catalogue is never served from here.
+fragment_cache = TTLCache(ttl=int(os.getenv('FRAGMENT_CACHE_TTL', '600')),
+                          maxsize=int(os.getenv('FRAGMENT_CACHE_SIZE', '512')))
+
+def render_fragment(key, template, context):
+    """
+    Render template once per key and reuse the HTML.
+
+    Args:
+        key: hashable tuple naming everything the fragment shows, versions included
+        template: a template that does not use current_user or the session
+        context: callable returning the template context, only called on a miss
+
+    Returns:
+        Markup, safe to output with {{ }} in the page template
+    """
+    return fragment_cache.get_or_load((template, key),
+        lambda: Markup(render_template(template, **context())))
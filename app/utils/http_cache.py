@@ -0,0 +1,50 @@
+import hashlib
+import os
+from functools import wraps
+from flask import current_app, make_response, request, session
+from flask_login import current_user
+
+# Seconds nginx and browsers may reuse an anonymous catalogue page without asking Flask again
+CATALOGUE_MAX_AGE = int(os.getenv('CATALOGUE_MAX_AGE', '60'))
+
+def etag_of(*parts):
+    """A short strong entity tag for the given values"""
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:20]
+
+def page_etag(version):
+    """
+    Entity tag of a page built from content `version`. base.html shows the logged-in
+    user's name and avatar, so they are part of the tag.
+    """
+    if current_user.is_authenticated:
+        return etag_of(version, current_user.get_id(), current_user.email, current_user.name, current_user.avatar)
+    return etag_of(version)
+
+def conditional(etag, max_age=0, private=False):
+    """
+    Decorator for read-only views: tag the response with etag(*view_args), answer
+    a matching If-None-Match with 304 Not Modified without running the view, and set
+    Cache-Control. Responses are public (cacheable by nginx) for max_age seconds,
+    unless private or for a logged-in user, which must revalidate every time.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            tag = etag(*args, **kwargs)
+            # a pending flash message is rendered (and consumed) by the page, so do not skip it
+            if (request.method in ('GET', 'HEAD') and request.if_none_match.contains_weak(tag)
+                    and '_flashes' not in session):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+            response.set_etag(tag)
+            if private or current_user.is_authenticated:
+                response.cache_control.private = True
+                response.cache_control.no_cache = True
+            else:
+                response.cache_control.public = True
+                response.cache_control.max_age = max_age
+            response.vary.add('Cookie')
+            return response
+        return wrapper
+    return decorator
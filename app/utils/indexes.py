@@ -0,0 +1,45 @@
+from app.models.users import User
+from app.models.package import Package
+from app.models.book import Booking
+from app.models.review import Review
+from app.models.token import UserTokens
+from app.models.trend import HotelDailyCost
+from app.models.rating import PackageRating
+from app.models.job import UploadJob
+
+# Every document whose declared indexes are managed by `flask indexes`
+DOCUMENTS = [User, Package, Booking, Review, UserTokens, HotelDailyCost, PackageRating, UploadJob]
+
+def create_indexes(documents=DOCUMENTS):
+    """
+    Create the indexes declared in each document's meta (existing ones are left alone).
+
+    Returns:
+        A list of the collection names that were processed.
+    """
+    for document in documents:
+        document.ensure_indexes()
+    return [document._get_collection_name() for document in documents]
+
+def index_report(documents=DOCUMENTS):
+    """
+    Compare the declared indexes with the ones in Mongo.
+
+    Returns:
+        A list of dictionaries, one per collection, with
+        'missing' (declared but not created), 'extra' (created but not declared)
+        and 'unused' (index names with no recorded access since the server started).
+    """
+    report = []
+    for document in documents:
+        comparison = document.compare_indexes()
+        stats = document._get_collection().aggregate([{'$indexStats': {}}])
+        unused = sorted(stat['name'] for stat in stats
+                        if stat['name'] != '_id_' and stat['accesses']['ops'] == 0)
+        report.append({
+            'collection': document._get_collection_name(),
+            'missing': comparison['missing'],
+            'extra': comparison['extra'],
+            'unused': unused,
+        })
+    return report
@@ -0,0 +1,261 @@
+import csv
+import io
+import os
+import datetime as dt
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from pymongo.errors import BulkWriteError
+from mongoengine.errors import ValidationError
+from werkzeug.security import generate_password_hash
+
+from app.models.users import User
+from app.models.package import Package
+from app.models.book import Booking
+from app.models.trend import HotelDailyCost
+
+# Rows written per insert_many, overridable per call
+UPLOAD_BATCH_SIZE = int(os.getenv('UPLOAD_BATCH_SIZE', '1000'))
+# Processes hashing passwords during a user import, and the batch size below which hashing stays in process
+HASH_WORKERS = int(os.getenv('UPLOAD_HASH_WORKERS', str(os.cpu_count() or 1)))
+HASH_PARALLEL_THRESHOLD = 64
+# Row errors kept for the report; the failed count keeps going past it
+MAX_REPORTED_ERRORS = 1000
+
+class IngestReport:
+    """Counts and per-row errors of one CSV ingestion"""
+
+    def __init__(self, datatype):
+        self.datatype = datatype
+        self.rows = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors = []
+
+    def error(self, line, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': line, 'error': message})
+
+    def to_dict(self):
+        return {'datatype': self.datatype, 'rows': self.rows, 'inserted': self.inserted,
+                'failed': self.failed, 'errors': self.errors}
+
+def read_csv(file):
+    """
+    Iterate over an uploaded CSV file one row at a time.
+
+    Args:
+        file: The uploaded FileStorage (or any binary file object).
+
+    Yields:
+        (line number in the file, row dictionary)
+    """
+    stream = getattr(file, 'stream', file)
+    text = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    reader = csv.DictReader(text, delimiter=',', quotechar='"')
+    for line, row in enumerate(reader, start=2):
+        yield line, row
+
+def batched(rows, size):
+    """Group an iterable into lists of at most size items."""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def existing_values(document_class, field, values):
+    """Return which of values are already stored in field, with one $in query."""
+    if not values:
+        return set()
+    return set(document_class.objects(**{f'{field}__in': list(values)}).scalar(field))
+
+def insert_batch(document_class, batch, report):
+    """
+    Insert prepared documents with one unordered insert_many, reporting the rows that fail.
+
+    Args:
+        document_class: The MongoEngine document class to insert into.
+        batch: A list of (line number, raw document dict).
+        report: The IngestReport to update.
+
+    Returns:
+        The (line number, raw document dict) items that were inserted.
+    """
+    if not batch:
+        return []
+    try:
+        document_class._get_collection().insert_many([son for _, son in batch], ordered=False)
+        report.inserted += len(batch)
+        return batch
+    except BulkWriteError as e:
+        failed = {}
+        for write_error in e.details.get('writeErrors', []):
+            duplicate = write_error.get('code') == 11000
+            failed[write_error['index']] = "Duplicate record" if duplicate else write_error.get('errmsg', 'Write failed')
+        report.inserted += e.details.get('nInserted', 0)
+        for index, (line, _) in enumerate(batch):
+            if index in failed:
+                report.error(line, failed[index])
+        return [item for index, item in enumerate(batch) if index not in failed]
+
+def hash_password(password):
+    """Hash one password the way auth.register does (top level so a process pool can pickle it)."""
+    return generate_password_hash(password, method='sha256')
+
+def hash_passwords(passwords, executor=None):
+    """Hash passwords in order, across the executor's processes when one is given."""
+    if executor is None or len(passwords) < HASH_PARALLEL_THRESHOLD:
+        return [hash_password(password) for password in passwords]
+    chunksize = max(1, len(passwords) // (HASH_WORKERS * 4))
+    return list(executor.map(hash_password, passwords, chunksize=chunksize))
+
+def ingest_users(rows, batch_size=None, progress=None):
+    """
+    Create users from CSV rows (email, password, name), skipping emails that already exist.
+
+    Existing emails are found with one $in query per batch and the passwords of the rows
+    that pass validation are hashed across a process pool of up to UPLOAD_HASH_WORKERS
+    processes. The pool is spawned rather than forked, as forking this threaded process
+    (log listener, pymongo monitors) can deadlock the children on locks those threads hold.
+
+    Returns:
+        An IngestReport.
+    """
+    report = IngestReport('Users')
+    seen = set()
+    pool = ProcessPoolExecutor(max_workers=HASH_WORKERS, mp_context=multiprocessing.get_context('spawn')) \
+        if HASH_WORKERS > 1 else nullcontext()
+    with pool as executor:
+        for batch in batched(rows, batch_size or UPLOAD_BATCH_SIZE):
+            report.rows += len(batch)
+            existing = existing_values(User, 'email', {row.get('email') for _, row in batch})
+            accepted = []
+            for line, row in batch:
+                email = row.get('email')
+                if not email or not row.get('password'):
+                    report.error(line, "Missing email or password")
+                    continue
+                if email in existing or email in seen:
+                    report.error(line, f"User {email} already exists")
+                    continue
+                user = User(email=email, name=row.get('name'), password=row['password'], avatar="")
+                try:
+                    user.validate()
+                except ValidationError as e:
+                    report.error(line, str(e))
+                    continue
+                seen.add(email)
+                accepted.append((line, user))
+
+            # only rows that will be inserted are worth hashing
+            passwords = hash_passwords([user.password for _, user in accepted], executor)
+            documents = []
+            for (line, user), password in zip(accepted, passwords):
+                user.password = password
+                documents.append((line, user.to_mongo().to_dict()))
+            insert_batch(User, documents, report)
+            if progress:
+                progress(report)
+    return report
+
+def ingest_packages(rows, batch_size=None, progress=None):
+    """
+    Create packages from CSV rows (hotel_name, duration, unit_cost, image_url, description).
+
+    Returns:
+        An IngestReport.
+    """
+    report = IngestReport('Package')
+    seen = set()
+    for batch in batched(rows, batch_size or UPLOAD_BATCH_SIZE):
+        report.rows += len(batch)
+        existing = existing_values(Package, 'hotel_name', {row.get('hotel_name') for _, row in batch})
+        documents = []
+        for line, row in batch:
+            hotel_name = row.get('hotel_name')
+            if hotel_name in existing or hotel_name in seen:
+                report.error(line, f"Package {hotel_name} already exists")
+                continue
+            try:
+                package = Package(hotel_name=hotel_name, duration=int(row['duration']),
+                    unit_cost=float(row['unit_cost']), image_url=row.get('image_url'),
+                    description=row.get('description'))
+                package.validate()
+            except (KeyError, TypeError, ValueError, ValidationError) as e:
+                report.error(line, f"Invalid package: {e}")
+                continue
+            seen.add(hotel_name)
+            documents.append((line, package.to_mongo().to_dict()))
+        insert_batch(Package, documents, report)
+        if progress:
+            progress(report)
+    Package.invalidateCache()
+    return report
+
+def ingest_bookings(rows, batch_size=None, progress=None):
+    """
+    Create bookings from CSV rows (check_in_date as YYYY-MM-DD, customer email, hotel_name).
+
+    Packages are resolved once from the catalogue and customers with one $in query per batch,
+    total_cost is computed in memory and the trend rollup is updated once per batch.
+
+    Returns:
+        An IngestReport.
+    """
+    report = IngestReport('Booking')
+    # read from the primary: the packages may have been uploaded moments ago
+    packages = {package.hotel_name: package for package in Package.objects()}
+    hotel_names = {package.pk: package.hotel_name for package in packages.values()}
+    for batch in batched(rows, batch_size or UPLOAD_BATCH_SIZE):
+        report.rows += len(batch)
+        emails = {row.get('customer') for _, row in batch}
+        customers = {user['email']: user['_id'] for user in
+                     User.objects(email__in=list(emails)).only('email').as_pymongo()}
+        documents = []
+        for line, row in batch:
+            customer = customers.get(row.get('customer'))
+            package = packages.get(row.get('hotel_name'))
+            if customer is None:
+                report.error(line, f"No such user {row.get('customer')}")
+                continue
+            if package is None:
+                report.error(line, f"No such package {row.get('hotel_name')}")
+                continue
+            try:
+                check_in_date = dt.datetime.strptime(row.get('check_in_date') or '', "%Y-%m-%d")
+            except ValueError:
+                report.error(line, f"Invalid check_in_date {row.get('check_in_date')}")
+                continue
+            documents.append((line, {'check_in_date': check_in_date, 'customer': customer,
+                                     'package': package.pk, 'total_cost': package.packageCost()}))
+        inserted = insert_batch(Booking, documents, report)
+        HotelDailyCost.addBookings([(hotel_names[son['package']], son['check_in_date'], son['total_cost'])
+                                    for _, son in inserted])
+        if progress:
+            progress(report)
+    return report
+
+# The CSV data types accepted by /upload
+INGESTERS = {'Users': ingest_users, 'Package': ingest_packages, 'Booking': ingest_bookings}
+
+def ingest(datatype, rows, batch_size=None, progress=None):
+    """
+    Ingest CSV rows of the given /upload data type.
+
+    Args:
+        datatype: 'Users', 'Package' or 'Booking'.
+        rows: (line number, row dictionary) items, e.g. from read_csv.
+        batch_size: Rows per insert_many (default UPLOAD_BATCH_SIZE).
+        progress: Optional callable given the IngestReport after every batch.
+
+    Returns:
+        An IngestReport.
+    """
+    if datatype not in INGESTERS:
+        raise ValueError(f"Unknown data type {datatype}")
+    return INGESTERS[datatype](rows, batch_size=batch_size, progress=progress)
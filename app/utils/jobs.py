@@ -0,0 +1,74 @@
+import os
+import time
+
+from app.models.job import UploadJob
+from app.models.package import Package
+from app.utils.ingest import read_csv, ingest
+from app.utils.log import get_logger
+
+log = get_logger('jobs')
+
+# Rows per second a worker may ingest (0 for no limit), to keep imports from starving web traffic
+UPLOAD_JOB_MAX_RATE = float(os.getenv('UPLOAD_JOB_MAX_RATE', '0'))
+# Seconds without progress after which a running job is taken as abandoned (its worker died) and
+# claimed again; keep it above the time a batch takes, including any --max-rate pause
+UPLOAD_JOB_STALL_TIMEOUT = int(os.getenv('UPLOAD_JOB_STALL_TIMEOUT', '600'))
+# Claims after which a job that keeps killing its worker is marked failed
+UPLOAD_JOB_MAX_ATTEMPTS = int(os.getenv('UPLOAD_JOB_MAX_ATTEMPTS', '3'))
+
+def run_job(job, max_rate=UPLOAD_JOB_MAX_RATE):
+    """
+    Ingest the CSV of a claimed job, saving progress after every batch.
+
+    Args:
+        job: An UploadJob in 'running' state.
+        max_rate: Rows per second to stay under (0 for no limit).
+    """
+    started = time.monotonic()
+
+    def progress(report):
+        job.updateProgress(report)
+        if max_rate:
+            ahead = report.rows / max_rate - (time.monotonic() - started)
+            if ahead > 0:
+                time.sleep(ahead)
+
+    try:
+        report = ingest(job.datatype, read_csv(job.file.get()), progress=progress)
+    except Exception as e:
+        log.exception('upload job %s failed', job.id)
+        job.fail(str(e))
+        return
+    job.complete(report)
+    if job.datatype == 'Package':
+        # only clears this process; web workers pick up the new packages when their
+        # PACKAGE_CACHE_TTL expires (or sooner, when a status poll reaches them)
+        Package.invalidateCache()
+
+def work(poll_interval=2.0, once=False, max_rate=UPLOAD_JOB_MAX_RATE, stall_timeout=UPLOAD_JOB_STALL_TIMEOUT):
+    """
+    Process queued upload jobs until interrupted.
+
+    Args:
+        poll_interval: Seconds to wait when the queue is empty.
+        once: Stop when the queue is empty instead of polling.
+        max_rate: Rows per second per job (0 for no limit).
+        stall_timeout: Seconds without progress before a running job is claimed again.
+
+    Returns:
+        The number of jobs processed.
+    """
+    processed = 0
+    while True:
+        job = UploadJob.claimNext(stall_timeout)
+        if job is None:
+            if once:
+                return processed
+            time.sleep(poll_interval)
+            continue
+        if job.attempts > UPLOAD_JOB_MAX_ATTEMPTS:
+            log.error('upload job %s abandoned %d times, giving up', job.id, job.attempts - 1)
+            job.fail(f"Worker stopped while processing this upload {job.attempts - 1} times")
+        else:
+            run_job(job, max_rate=max_rate)
+        processed += 1
@@ -0,0 +1,93 @@
+"""
+JSON providers for jsonify(), current_app.json and the NDJSON review stream.
+
+OrjsonProvider serializes with orjson (an optional dependency, several times faster
+than the json module on the large booking and review lists); StdlibJSONProvider is
+the fallback when it is not installed. Both turn ObjectIds into strings and datetimes
+into HTTP dates, as Flask's default provider does, unless JSON_ISO_DATES is set, and
+serialize documents and querysets like flask-mongoengine's JSON encoder.
+"""
+import json
+from datetime import date, datetime, timezone
+from bson import ObjectId, json_util
+from flask.json.provider import DefaultJSONProvider
+from mongoengine.base import BaseDocument
+from mongoengine.queryset import QuerySet
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+_DAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+_MONTHS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+def _http_date(o):
+    """werkzeug's http_date for datetimes (naive means UTC), several times faster"""
+    if not isinstance(o, datetime):
+        return http_date(o)
+    if o.tzinfo is not None:
+        o = o.astimezone(timezone.utc)
+    return (f"{_DAYS[o.weekday()]}, {o.day:02d} {_MONTHS[o.month - 1]} {o.year:04d} "
+            f"{o.hour:02d}:{o.minute:02d}:{o.second:02d} GMT")
+
+def _default(o):
+    if isinstance(o, ObjectId):
+        return str(o)
+    # what flask-mongoengine's JSON encoder does for documents and querysets (Extended JSON),
+    # through bson's public dumps
+    if isinstance(o, BaseDocument):
+        return json.loads(json_util.dumps(o.to_mongo()))
+    if isinstance(o, QuerySet):
+        return json.loads(json_util.dumps(list(o.as_pymongo())))
+    if isinstance(o, date):
+        return _http_date(o)
+    return DefaultJSONProvider.default(o)
+
+def _iso_default(o):
+    if isinstance(o, date):
+        return o.isoformat()
+    return _default(o)
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """Flask's json module based provider, extended with ObjectId support"""
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.default = _iso_default if app.config.get('JSON_ISO_DATES') else _default
+
+    def dumps(self, obj, **kwargs):
+        # not through app.json_encoder, which flask-mongoengine replaces and which would bypass self.default
+        kwargs.setdefault('default', self.default)
+        kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        return json.dumps(obj, **kwargs)
+
+class OrjsonProvider(StdlibJSONProvider):
+    """orjson based provider; output matches StdlibJSONProvider"""
+
+    def __init__(self, app):
+        super().__init__(app)
+        # orjson writes ISO datetimes natively; keep them away from it to produce HTTP dates
+        self.option = orjson.OPT_NON_STR_KEYS
+        if not app.config.get('JSON_ISO_DATES'):
+            self.option |= orjson.OPT_PASSTHROUGH_DATETIME
+
+    def dumps(self, obj, **kwargs):
+        option = self.option
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        default = kwargs.get('default', self.default)
+        return orjson.dumps(obj, default=default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+def json_provider(app):
+    """The provider named by JSON_PROVIDER ('orjson' or 'stdlib'), falling back to stdlib without orjson"""
+    if app.config.get('JSON_PROVIDER', 'orjson') == 'orjson' and orjson is not None:
+        return OrjsonProvider(app)
+    return StdlibJSONProvider(app)
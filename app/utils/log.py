@@ -0,0 +1,87 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+
+# Every application logger lives under this name, e.g. staycation.api
+ROOT_LOGGER = 'staycation'
+
+_listener = None
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and any `extra` fields"""
+
+    RESERVED = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in self.RESERVED})
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+def parse_levels(spec):
+    """Turn 'api=DEBUG,auth=WARNING' into {'staycation.api': 'DEBUG', 'staycation.auth': 'WARNING'}."""
+    levels = {}
+    for item in filter(None, (part.strip() for part in (spec or '').split(','))):
+        name, _, level = item.partition('=')
+        name = name.strip()
+        if not name.startswith(ROOT_LOGGER):
+            name = f'{ROOT_LOGGER}.{name}'
+        levels[name] = level.strip().upper()
+    return levels
+
+def configure_logging():
+    """
+    Send the application's logs through a queue to a single background thread that writes them,
+    so request threads never block on stderr.
+
+    Environment:
+        LOG_LEVEL: level of the staycation loggers (default INFO).
+        LOG_LEVELS: per-module overrides, e.g. 'api=DEBUG,auth=WARNING'.
+        LOG_FORMAT: 'json' (default) or 'text'.
+        LOG_DEBUG_SAMPLE_RATE: share of debug_sampled() events kept, 0 to 1 (default 0.01).
+    """
+    global _listener
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
+    for name, level in parse_levels(os.getenv('LOG_LEVELS')).items():
+        logging.getLogger(name).setLevel(level)
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(sys.stderr)
+    if os.getenv('LOG_FORMAT', 'json') == 'text':
+        output.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+    else:
+        output.setFormatter(JsonFormatter())
+
+    records = queue.SimpleQueue()
+    root.addHandler(logging.handlers.QueueHandler(records))
+    root.propagate = False
+    _listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+def get_logger(module):
+    """The logger of an application module, e.g. get_logger('api') for staycation.api."""
+    return logging.getLogger(f'{ROOT_LOGGER}.{module}')
+
+DEBUG_SAMPLE_RATE = float(os.getenv('LOG_DEBUG_SAMPLE_RATE', '0.01'))
+
+def debug_sampled(logger, message, *args, rate=None, **kwargs):
+    """
+    Log a high-volume debug event for only a share of the calls.
+    Nothing is formatted or sampled when debug is off for the logger.
+    """
+    if logger.isEnabledFor(logging.DEBUG) and random.random() < (DEBUG_SAMPLE_RATE if rate is None else rate):
+        logger.debug(message, *args, **kwargs)
@@ -0,0 +1,147 @@
+import threading
+import time
+from flask import g, request, Response
+
+from app.utils.monitoring import command_counter
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COMMAND_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+
+def _labels(names, values):
+    """Render a Prometheus label set, escaping the values."""
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+class Counter:
+    """A Prometheus counter with labels"""
+
+    def __init__(self, name, documentation, labelnames):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_labels(self.labelnames, labels)} {value}')
+        return lines
+
+class Histogram:
+    """A Prometheus histogram with labels and fixed buckets"""
+
+    def __init__(self, name, documentation, labelnames, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        with self._lock:
+            series = self._series.setdefault(labels, {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0})
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['buckets'][index] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        names = self.labelnames + ('le',)
+        with self._lock:
+            for labels, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series['buckets']):
+                    lines.append(f'{self.name}_bucket{_labels(names, labels + (bound,))} {count}')
+                lines.append(f'{self.name}_bucket{_labels(names, labels + ("+Inf",))} {series["count"]}')
+                lines.append(f'{self.name}_sum{_labels(self.labelnames, labels)} {series["sum"]}')
+                lines.append(f'{self.name}_count{_labels(self.labelnames, labels)} {series["count"]}')
+        return lines
+
+class RequestMetrics:
+    """
+    Per-endpoint request latency, Mongo commands and response size, served on /metrics
+    in the Prometheus text format.
+
+    Metrics are kept per process: with several gunicorn workers each scrape sees the
+    worker that answered it.
+    """
+
+    def __init__(self):
+        labels = ('endpoint', 'method')
+        self.requests = Counter('staycation_requests_total', 'Requests handled.', labels + ('status',))
+        self.latency = Histogram('staycation_request_duration_seconds', 'Request latency.', labels, LATENCY_BUCKETS)
+        self.commands = Histogram('staycation_request_mongo_commands', 'Mongo commands issued per request.', labels, COMMAND_BUCKETS)
+        self.mongo_seconds = Counter('staycation_request_mongo_seconds_total', 'Time spent in Mongo commands.', labels)
+        self.size = Histogram('staycation_response_size_bytes', 'Response body size.', labels, SIZE_BUCKETS)
+        self._collectors = []
+
+    def init_app(self, app):
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        app.add_url_rule('/metrics', 'metrics', self.metrics_view)
+
+    def add_collector(self, name, documentation, collect, kind='gauge'):
+        """
+        Expose values computed at scrape time, e.g. cache or connection pool statistics.
+
+        Args:
+            name: The metric name.
+            documentation: The HELP text.
+            collect: A callable returning a list of (label dict, value).
+            kind: The Prometheus type, 'gauge' or 'counter'.
+        """
+        self._collectors.append((name, documentation, collect, kind))
+
+    def _before_request(self):
+        g._metrics_started = time.perf_counter()
+        g._metrics_commands = command_counter.start()
+
+    def _after_request(self, response):
+        started = g.pop('_metrics_started', None)
+        commands = g.pop('_metrics_commands', None)
+        if started is None:
+            return response
+        command_counter.stop(commands)
+        labels = (request.endpoint or 'unmatched', request.method)
+        self.requests.inc(labels + (response.status_code,))
+        self.latency.observe(labels, time.perf_counter() - started)
+        self.commands.observe(labels, len(commands))
+        self.mongo_seconds.inc(labels, commands.seconds)
+        # streamed responses have no length up front
+        if response.content_length is not None:
+            self.size.observe(labels, response.content_length)
+        return response
+
+    def _teardown_request(self, exc):
+        # after_request is skipped when the view raised; still stop recording this thread
+        commands = g.pop('_metrics_commands', None)
+        if commands is not None:
+            command_counter.stop(commands)
+            g.pop('_metrics_started', None)
+            self.requests.inc((request.endpoint or 'unmatched', request.method, 500))
+
+    def render(self):
+        lines = []
+        for metric in (self.requests, self.latency, self.commands, self.mongo_seconds, self.size):
+            lines += metric.render()
+        for name, documentation, collect, kind in self._collectors:
+            lines += [f'# HELP {name} {documentation}', f'# TYPE {name} {kind}']
+            for labels, value in collect():
+                lines.append(f'{name}{_labels(labels.keys(), labels.values())} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def metrics_view(self):
+        return Response(self.render(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,170 @@
+import json
+import threading
+from contextlib import contextmanager
+from pymongo import monitoring
+
+# Command fields that decide what a query looks like, regardless of the values in it
+SHAPE_FIELDS = ('filter', 'pipeline', 'projection', 'sort', 'updates', 'deletes')
+
+def value_shape(value):
+    """Replace the values in a query document with '?', keeping field names and operators."""
+    if isinstance(value, dict):
+        return {key: value_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)) and value and all(isinstance(item, dict) for item in value):
+        return [value_shape(item) for item in value]
+    return '?'
+
+def command_collection(command_name, command):
+    """The collection a command runs on (getMore names its cursor id first)."""
+    if command_name == 'getMore':
+        return command.get('collection')
+    return command.get(command_name)
+
+def command_shape(command_name, command):
+    """A string that is equal for two commands differing only by the values they query."""
+    fields = {key: value_shape(command[key]) for key in SHAPE_FIELDS if key in command}
+    return f"{command_name} {command_collection(command_name, command)} {json.dumps(fields, sort_keys=True, default=str)}"
+
+class CommandLog(list):
+    """
+    The names of the Mongo commands recorded during a count, plus their total duration in seconds.
+    A detailed log also keeps, in `details`, each command's collection, shape and duration.
+    """
+
+    def __init__(self, detailed=False):
+        super().__init__()
+        self.seconds = 0.0
+        self.detailed = detailed
+        self.details = []
+
+class CommandCounter(monitoring.CommandListener):
+    """Record the Mongo commands issued by the current thread while a count is active"""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def _active(self):
+        if not hasattr(self._local, 'active'):
+            self._local.active = []
+            self._local.pending = {}
+        return self._local.active
+
+    def started(self, event):
+        active = self._active()
+        detail = None
+        for log in active:
+            log.append(event.command_name)
+            if log.detailed:
+                if detail is None:
+                    # shapes are only worked out when someone asked for them
+                    detail = {'command': event.command_name,
+                              'collection': command_collection(event.command_name, event.command),
+                              'shape': command_shape(event.command_name, event.command),
+                              'ms': None}
+                    self._local.pending[event.request_id] = detail
+                log.details.append(detail)
+
+    def _finished(self, event):
+        for log in self._active():
+            log.seconds += event.duration_micros / 1e6
+        detail = self._local.pending.pop(event.request_id, None)
+        if detail is not None:
+            detail['ms'] = event.duration_micros / 1000
+
+    def succeeded(self, event):
+        self._finished(event)
+
+    def failed(self, event):
+        self._finished(event)
+
+    def start(self, detailed=False):
+        """Start recording the current thread's commands into a new CommandLog and return it."""
+        log = CommandLog(detailed=detailed)
+        self._active().append(log)
+        return log
+
+    def stop(self, log):
+        """Stop recording into log (a no-op if it was already stopped)."""
+        active = self._active()
+        for index, entry in enumerate(active):
+            # logs are lists, so compare identity rather than contents
+            if entry is log:
+                del active[index]
+                return
+
+    @contextmanager
+    def count(self, detailed=False):
+        """Collect the names of the commands run inside the block; len() is the number of round-trips."""
+        log = self.start(detailed=detailed)
+        try:
+            yield log
+        finally:
+            self.stop(log)
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Track connection pool utilisation: open connections, connections in use, waiting threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {'open': 0, 'checked_out': 0, 'waiting': 0, 'checkout_failures': 0}
+
+    def _add(self, key, amount):
+        with self._lock:
+            self._stats[key] += amount
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._add('open', 1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._add('open', -1)
+
+    def connection_check_out_started(self, event):
+        self._add('waiting', 1)
+
+    def connection_check_out_failed(self, event):
+        self._add('waiting', -1)
+        self._add('checkout_failures', 1)
+
+    def connection_checked_out(self, event):
+        self._add('waiting', -1)
+        self._add('checked_out', 1)
+
+    def connection_checked_in(self, event):
+        self._add('checked_out', -1)
+
+# Listeners only apply to clients created after registration, so this module is
+# imported by app.extensions before MongoEngine opens its connection.
+command_counter = CommandCounter()
+monitoring.register(command_counter)
+pool_monitor = PoolMonitor()
+monitoring.register(pool_monitor)
+
+def count_commands(detailed=False):
+    """
+    Count Mongo round-trips made by the current thread.
+
+    Usage:
+        with count_commands() as commands:
+            Booking.createBooking(...)
+        print(len(commands), commands, commands.seconds)
+    """
+    return command_counter.count(detailed=detailed)
@@ -0,0 +1,100 @@
+import json
+import logging
+import os
+from collections import Counter
+from contextlib import contextmanager
+from flask import g, request
+
+from app.utils.monitoring import command_counter, count_commands
+
+# A query shape seen this many times in one request is reported as a likely N+1
+N_PLUS_ONE_THRESHOLD = 3
+# Commands slower than this (milliseconds) are reported as slow
+SLOW_QUERY_MS = 100
+
+def find_problems(log, repeat_threshold=N_PLUS_ONE_THRESHOLD, slow_ms=SLOW_QUERY_MS):
+    """
+    Look through a detailed CommandLog for repeated query shapes and slow commands.
+
+    Returns:
+        A list of dictionaries with a 'type' of 'n_plus_one' or 'slow_query'.
+    """
+    problems = []
+    repeats = Counter(detail['shape'] for detail in log.details)
+    for shape, count in repeats.items():
+        if count >= repeat_threshold:
+            problems.append({'type': 'n_plus_one', 'shape': shape, 'count': count})
+    for detail in log.details:
+        if detail['ms'] is not None and detail['ms'] >= slow_ms:
+            problems.append({'type': 'slow_query', 'shape': detail['shape'], 'ms': round(detail['ms'], 3)})
+    return problems
+
+class QueryProfiler:
+    """
+    Per request, flag repeated identical-shape queries (N+1) and slow queries,
+    writing one JSON line per finding to QUERY_PROFILER_LOG.
+
+    Enabled when QUERY_PROFILER_LOG (a file path) is set in the config or environment;
+    QUERY_PROFILER_REPEATS and QUERY_PROFILER_SLOW_MS tune the thresholds.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger('staycation.queries')
+        self.enabled = False
+
+    def init_app(self, app):
+        path = app.config.setdefault('QUERY_PROFILER_LOG', os.getenv('QUERY_PROFILER_LOG'))
+        self.repeat_threshold = int(app.config.setdefault('QUERY_PROFILER_REPEATS',
+            os.getenv('QUERY_PROFILER_REPEATS', N_PLUS_ONE_THRESHOLD)))
+        self.slow_ms = float(app.config.setdefault('QUERY_PROFILER_SLOW_MS',
+            os.getenv('QUERY_PROFILER_SLOW_MS', SLOW_QUERY_MS)))
+        if not path:
+            return
+        self.enabled = True
+        if not self.logger.handlers:
+            handler = logging.FileHandler(path)
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            self.logger.addHandler(handler)
+            self.logger.setLevel(logging.INFO)
+            self.logger.propagate = False
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    def _before_request(self):
+        g._profiler_commands = command_counter.start(detailed=True)
+
+    def _after_request(self, response):
+        commands = g.pop('_profiler_commands', None)
+        if commands is None:
+            return response
+        command_counter.stop(commands)
+        for problem in find_problems(commands, self.repeat_threshold, self.slow_ms):
+            problem.update({'endpoint': request.endpoint, 'method': request.method,
+                            'path': request.path, 'commands': len(commands)})
+            self.logger.info(json.dumps(problem))
+        return response
+
+    def _teardown_request(self, exc):
+        commands = g.pop('_profiler_commands', None)
+        if commands is not None:
+            command_counter.stop(commands)
+
+@contextmanager
+def query_budget(max_commands, max_repeats=None):
+    """
+    Fail with AssertionError when the block issues more than max_commands Mongo commands,
+    or (when max_repeats is given) repeats one query shape more than max_repeats times.
+
+    Usage in tests:
+        with query_budget(4, max_repeats=1):
+            client.post('/api/review/getAllReviews', headers=headers)
+    """
+    with count_commands(detailed=True) as commands:
+        yield commands
+    assert len(commands) <= max_commands, \
+        f"{len(commands)} Mongo commands, budget is {max_commands}: {[detail['shape'] for detail in commands.details]}"
+    if max_repeats is not None:
+        repeats = Counter(detail['shape'] for detail in commands.details)
+        shape, count = repeats.most_common(1)[0] if repeats else (None, 0)
+        assert count <= max_repeats, f"query shape repeated {count} times, at most {max_repeats} allowed: {shape}"
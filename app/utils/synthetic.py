@@ -0,0 +1,221 @@
+import csv
+import os
+import random
+import struct
+import datetime as dt
+from bson import ObjectId
+
+from app.models.users import User
+from app.models.package import Package
+from app.models.book import Booking
+from app.models.review import Review
+from app.models.trend import HotelDailyCost
+from app.models.rating import PackageRating
+from app.utils.ingest import IngestReport, batched, existing_values, hash_password, insert_batch, UPLOAD_BATCH_SIZE
+
+# Every synthetic user logs in with this password (as in app/assets/js/users.csv)
+SYNTHETIC_PASSWORD = '12345'
+# Share of ratings 1..5: most reviews are good, with a smaller bump of angry ones
+RATING_WEIGHTS = (8, 4, 8, 25, 55)
+# Relative demand per month, Jan..Dec: school holidays in June and December
+MONTH_DEMAND = (0.8, 0.7, 0.8, 0.8, 0.9, 1.3, 1.1, 0.9, 0.9, 0.9, 1.0, 1.5)
+# Friday and Saturday check-ins are more popular
+WEEKDAY_DEMAND = (0.8, 0.8, 0.8, 0.9, 1.3, 1.4, 1.0)
+MAX_DEMAND = max(MONTH_DEMAND) * max(WEEKDAY_DEMAND)
+# Popularity of the n-th package falls off like 1 / n ** PACKAGE_SKEW
+PACKAGE_SKEW = 0.8
+IMAGES = ('https://bit.ly/3Ifjcn6', 'https://bit.ly/3Ideiaa', 'https://bit.ly/3pKtO7b')
+TITLES = ('Great stay', 'Lovely staff', 'Would come back', 'Decent value', 'Not as pictured', 'Too noisy')
+COMMENTS = ('Room was clean and quiet.', 'Breakfast could be better.', 'Pool was amazing.',
+            'Check-in took a while.', 'Perfect for a weekend away.', 'Staff went out of their way for us.')
+THEMES = ('Family', 'Romantic', 'Wellness', 'Adventure', 'Foodie')
+# Kind byte of the generated ObjectIds
+KINDS = {'user': 1, 'package': 2, 'booking': 3, 'review': 4}
+ID_TIMESTAMP = 1577836800  # 2020-01-01
+
+def synthetic_id(kind, seed, index):
+    """
+    A deterministic ObjectId for the index-th generated document of a kind, so bookings and
+    reviews can reference users, packages and bookings without keeping or querying their ids.
+    """
+    return ObjectId(struct.pack('>IBHBI', ID_TIMESTAMP, KINDS[kind], seed & 0xFFFF, 0, index))
+
+# The seed is part of the unique email and hotel name (as of the ids), so datasets of different seeds can coexist
+def user_email(seed, index):
+    return f"u{seed}-{index}@synthetic.io"
+
+def user_row(seed, index):
+    return {'email': user_email(seed, index), 'password': SYNTHETIC_PASSWORD, 'name': f"Synthetic User {seed}-{index}"}
+
+def hotel_name(seed, index):
+    return f"Synthetic Hotel {seed}-{index}"
+
+def package_row(seed, index):
+    rng = random.Random(seed * 1000003 + index)
+    name = hotel_name(seed, index)
+    return {'hotel_name': name, 'duration': rng.randint(1, 4),
+            'unit_cost': float(rng.randrange(80, 900, 10)), 'image_url': rng.choice(IMAGES),
+            'description': f"{name}: a {rng.choice(THEMES).lower()} staycation."}
+
+class DatasetGenerator:
+    """
+    Streams synthetic users, packages, bookings and reviews. Memory stays constant in the number
+    of users, bookings and reviews (only the package prices and popularity are kept), and the
+    same seed always gives the same rows.
+    """
+
+    def __init__(self, users, packages, bookings, review_rate=0.3, seed=381,
+                 start=dt.date(2024, 1, 1), days=730):
+        self.users = users
+        self.packages = packages
+        self.bookings = bookings
+        self.review_rate = review_rate
+        self.seed = seed
+        self.start = start
+        self.days = days
+        rows = [package_row(seed, index) for index in range(packages)]
+        self.package_costs = [(row['hotel_name'], row['unit_cost'] * row['duration']) for row in rows]
+        self.package_weights = list(_cumulative(1 / (rank + 1) ** PACKAGE_SKEW for rank in range(packages)))
+
+    def user_rows(self):
+        for index in range(self.users):
+            yield user_row(self.seed, index)
+
+    def package_rows(self):
+        for index in range(self.packages):
+            yield package_row(self.seed, index)
+
+    def check_in_date(self, rng):
+        """A check-in date in [start, start + days), weighted by season and day of week"""
+        while True:
+            day = self.start + dt.timedelta(days=rng.randrange(self.days))
+            if rng.random() * MAX_DEMAND < MONTH_DEMAND[day.month - 1] * WEEKDAY_DEMAND[day.weekday()]:
+                return day
+
+    def booking_rows(self):
+        """
+        Yields (booking, review or None) pairs of dicts holding the indexes of the user, package
+        and booking along with the CSV fields.
+        """
+        rng = random.Random(self.seed)
+        for index in range(self.bookings):
+            customer = rng.randrange(self.users)
+            package = rng.choices(range(self.packages), cum_weights=self.package_weights)[0]
+            hotel_name, total_cost = self.package_costs[package]
+            booking = {'index': index, 'user': customer, 'package': package, 'customer': user_email(self.seed, customer),
+                       'hotel_name': hotel_name, 'check_in_date': self.check_in_date(rng), 'total_cost': total_cost}
+            review = None
+            if rng.random() < self.review_rate:
+                review = {'rating': rng.choices(range(1, 6), weights=RATING_WEIGHTS)[0],
+                          'title': rng.choice(TITLES), 'comment': rng.choice(COMMENTS),
+                          'suggested_theme': rng.choice(THEMES)}
+            yield booking, review
+
+    def write_csv(self, directory):
+        """
+        Write users.csv, staycation.csv and booking.csv in the /upload format, and reviews.csv
+        (customer, hotel_name, check_in_date, rating, title, comment, suggested_theme).
+
+        Returns:
+            {file name: rows written}
+        """
+        os.makedirs(directory, exist_ok=True)
+        counts = {}
+        def write(name, header, rows):
+            with open(os.path.join(directory, name), 'w', newline='', encoding='utf-8') as file:
+                writer = csv.writer(file, quoting=csv.QUOTE_MINIMAL)
+                writer.writerow(header)
+                counts[name] = 0
+                for row in rows:
+                    writer.writerow(row)
+                    counts[name] += 1
+
+        write('users.csv', ('email', 'password', 'name'),
+              ((row['email'], row['password'], row['name']) for row in self.user_rows()))
+        write('staycation.csv', ('hotel_name', 'duration', 'unit_cost', 'image_url', 'description'),
+              ((row['hotel_name'], row['duration'], f"{row['unit_cost']:.2f}", row['image_url'], row['description'])
+               for row in self.package_rows()))
+        with open(os.path.join(directory, 'reviews.csv'), 'w', newline='', encoding='utf-8') as reviews_file:
+            reviews = csv.writer(reviews_file)
+            reviews.writerow(('customer', 'hotel_name', 'check_in_date', 'rating', 'title', 'comment', 'suggested_theme'))
+            counts['reviews.csv'] = 0
+            def bookings():
+                for booking, review in self.booking_rows():
+                    check_in_date = booking['check_in_date'].isoformat()
+                    if review:
+                        reviews.writerow((booking['customer'], booking['hotel_name'], check_in_date, review['rating'],
+                                          review['title'], review['comment'], review['suggested_theme']))
+                        counts['reviews.csv'] += 1
+                    yield check_in_date, booking['customer'], booking['hotel_name']
+            write('booking.csv', ('check_in_date', 'customer', 'hotel_name'), bookings())
+        return counts
+
+    def insert(self, batch_size=None, progress=None):
+        """
+        Bulk insert everything into Mongo with deterministic ids (rows already there are reported
+        as duplicates), keeping the trend rollup and rating summaries up to date. Bookings are only
+        written for users and packages stored under their synthetic ids, and reviews only for
+        bookings that were inserted, so nothing references a missing document.
+
+        Returns:
+            {data type: IngestReport}
+        """
+        batch_size = batch_size or UPLOAD_BATCH_SIZE
+        reports = {name: IngestReport(name) for name in ('Users', 'Package', 'Booking', 'Review')}
+        password = hash_password(SYNTHETIC_PASSWORD)
+
+        users = ((index, dict(row, _id=synthetic_id('user', self.seed, index), password=password, avatar=""))
+                 for index, row in enumerate(self.user_rows()))
+        packages = ((index, dict(row, _id=synthetic_id('package', self.seed, index)))
+                    for index, row in enumerate(self.package_rows()))
+        # indexes of the users and packages that are neither inserted nor already there (e.g. an
+        # email taken by another document), which bookings must not reference
+        missing = {User: set(), Package: set()}
+        for document_class, report, rows in ((User, reports['Users'], users), (Package, reports['Package'], packages)):
+            for batch in batched(rows, batch_size):
+                report.rows += len(batch)
+                inserted = {index for index, _ in insert_batch(document_class, batch, report)}
+                failed = [(index, son['_id']) for index, son in batch if index not in inserted]
+                stored = existing_values(document_class, 'id', {_id for _, _id in failed})
+                missing[document_class].update(index for index, _id in failed if _id not in stored)
+                if progress:
+                    progress(report)
+        Package.invalidateCache()
+
+        hotel_names = {synthetic_id('package', self.seed, index): name
+                       for index, (name, _) in enumerate(self.package_costs)}
+        for batch in batched(self.booking_rows(), batch_size):
+            bookings, reviews = [], {}
+            for booking, review in batch:
+                if booking['user'] in missing[User] or booking['package'] in missing[Package]:
+                    reports['Booking'].rows += 1
+                    reports['Booking'].error(booking['index'], "User or package was not inserted")
+                    continue
+                booking_id = synthetic_id('booking', self.seed, booking['index'])
+                check_in_date = dt.datetime.combine(booking['check_in_date'], dt.time())
+                customer = synthetic_id('user', self.seed, booking['user'])
+                package = synthetic_id('package', self.seed, booking['package'])
+                bookings.append((booking['index'], {'_id': booking_id, 'check_in_date': check_in_date,
+                    'customer': customer, 'package': package, 'total_cost': booking['total_cost']}))
+                if review:
+                    reviews[booking['index']] = dict(review, _id=synthetic_id('review', self.seed, booking['index']),
+                        customer=customer, package=package, booking=booking_id,
+                        date=check_in_date + dt.timedelta(days=1))
+            reports['Booking'].rows += len(bookings)
+            inserted = insert_batch(Booking, bookings, reports['Booking'])
+            HotelDailyCost.addBookings([(hotel_names[son['package']], son['check_in_date'], son['total_cost'])
+                                        for _, son in inserted])
+            # reviews of the bookings just inserted, so a rerun does not count ratings twice
+            reviews = [(index, reviews[index]) for index, _ in inserted if index in reviews]
+            reports['Review'].rows += len(reviews)
+            PackageRating.addRatings([(son['package'], son['rating'])
+                                      for _, son in insert_batch(Review, reviews, reports['Review'])])
+            if progress:
+                progress(reports['Booking'])
+        return reports
+
+def _cumulative(values):
+    total = 0
+    for value in values:
+        total += value
+        yield total
@@ -0,0 +1,203 @@
+"""
+Microbenchmarks of the model and serialization layers against an in-memory Mongo (mongomock).
+
+    PYTHONPATH=. python tests/benchmark/microbench.py --output bench.json
+    PYTHONPATH=. python tests/benchmark/microbench.py --scales 1000,10000 --compare bench.json
+    PYTHONPATH=. python tests/benchmark/microbench.py --host mongodb://localhost:27017
+
+Every scale (number of bookings, reviews and packages) gets a fresh in-memory database,
+or with --host a fresh staycation_bench database on that server (dropped first).
+mongomock lacks $dateTrunc, so the week/month trend aggregations are only measured
+with --host; the trend_chart default (daily rollup) is measured on both.
+Results go to a JSON file tagged with the git commit; --compare exits with 1 when a
+benchmark is slower than in the given earlier results by more than --tolerance.
+mongomock is only needed without --host: pip install mongomock.
+"""
+import argparse
+import base64
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+import timeit
+from datetime import datetime, timedelta
+
+try:
+    import mongomock
+except ImportError:  # only needed without --host
+    mongomock = None
+
+import mongoengine
+from bson import ObjectId, json_util
+from app import create_app
+from app.models.users import User
+from app.models.package import Package
+from app.models.book import Booking
+from app.models.review import Review
+from app.models.trend import HotelDailyCost
+from app.utils.api import extract_keys
+from app.utils.api_review import ReviewAPI
+from app.utils.indexes import DOCUMENTS
+
+DB_NAME = 'staycation_bench'
+SEED = 381
+# packages referenced by bookings and reviews; the rest only exist for the catalogue benchmarks
+BOOKED_PACKAGES = 100
+CREATE_REVIEW_CALLS = 200
+START = datetime(2024, 1, 1)
+# errors of the aggregation operators mongomock does not implement
+UNSUPPORTED = (NotImplementedError, mongomock.OperationFailure) if mongomock else (NotImplementedError,)
+
+def connect(host=None):
+    """Point every Document at a fresh database, in memory unless a Mongo host is given"""
+    mongoengine.disconnect()
+    if host:
+        mongoengine.connect(DB_NAME, host=host)
+    else:
+        mongoengine.connect(DB_NAME, host='localhost', mongo_client_class=mongomock.MongoClient)
+    mongoengine.get_db().client.drop_database(DB_NAME)
+    for document in DOCUMENTS:
+        document.ensure_indexes()
+    Package.invalidateCache()
+
+def seed(scale):
+    """scale packages, bookings and one review per booking, by scale // 10 users"""
+    rng = random.Random(SEED)
+    users = [{'_id': ObjectId(), 'email': f"bench{i}@staycation.test", 'name': f"Bench {i}",
+              'password': 'x', 'avatar': ''} for i in range(max(scale // 10, 1))]
+    packages = [{'_id': ObjectId(), 'hotel_name': f"Hotel {i}", 'duration': rng.randint(1, 5),
+                 'unit_cost': float(rng.randint(100, 900)), 'image_url': f"hotel{i}.jpg",
+                 'description': "A quiet stay by the sea. " * 8} for i in range(scale)]
+    bookings, reviews, rollup = [], [], {}
+    for i in range(scale):
+        user, package = rng.choice(users), packages[rng.randrange(min(scale, BOOKED_PACKAGES))]
+        check_in_date = START + timedelta(days=rng.randrange(730))
+        total_cost = package['unit_cost'] * package['duration']
+        bookings.append({'_id': ObjectId(), 'check_in_date': check_in_date, 'customer': user['_id'],
+                         'package': package['_id'], 'total_cost': total_cost})
+        reviews.append({'_id': ObjectId(), 'customer': user['_id'], 'package': package['_id'],
+                        'booking': bookings[-1]['_id'], 'rating': rng.choices(range(1, 6), [1, 1, 2, 4, 6])[0],
+                        'title': "Great stay", 'comment': "Room was clean and quiet.", 'date': check_in_date})
+        cost, count = rollup.get((package['hotel_name'], check_in_date), (0, 0))
+        rollup[(package['hotel_name'], check_in_date)] = (cost + total_cost, count + 1)
+    for document, rows in ((User, users), (Package, packages), (Booking, bookings), (Review, reviews)):
+        document._get_collection().insert_many(rows)
+    # what HotelDailyCost.addBookings upserts (mongomock cannot run its bulk UpdateOnes with recent pymongo)
+    HotelDailyCost._get_collection().insert_many([
+        {'hotel_name': hotel_name, 'check_in_date': day, 'total_cost': cost, 'count': count}
+        for (hotel_name, day), (cost, count) in rollup.items()])
+    return users, packages
+
+def legacy_packages():
+    """getAllPackages before projection: Documents -> to_mongo -> BSON JSON -> dict -> extract_keys"""
+    packages_list = [json.loads(json_util.dumps(package.to_mongo())) for package in Package.objects()]
+    return [extract_keys(k, idx+1) for idx, k in enumerate(packages_list)]
+
+def projected_packages():
+    """getAllPackages now: projected as_pymongo() dicts -> extract_keys"""
+    rows = Package.objects().only('hotel_name', 'image_url', 'description', 'unit_cost', 'duration').exclude('id').as_pymongo()
+    return [extract_keys(k, idx+1) for idx, k in enumerate(rows)]
+
+def create_reviews(app, user, packages, calls):
+    """Mean seconds of ReviewAPI.create_review, each call on a booking without a review"""
+    rng = random.Random(SEED)
+    customer = User.objects(id=user['_id']).first()
+    targets = []
+    for i in range(calls):
+        package = packages[rng.randrange(min(len(packages), BOOKED_PACKAGES))]
+        check_in_date = START + timedelta(days=1000 + i)
+        Booking._get_collection().insert_one({'check_in_date': check_in_date, 'customer': customer.id,
+                                              'package': package['_id'], 'total_cost': 100.0})
+        targets.append({'hotel_name': package['hotel_name'], 'check_in_date': check_in_date.strftime('%Y-%m-%d'),
+                        'rating': 5, 'title': "Benchmark", 'comment': "Created by microbench.py"})
+    credentials = base64.b64encode(f"{customer.email}:token".encode('utf-8')).decode('utf-8')
+    with app.test_request_context(headers={'Authorization': f'Basic {credentials}'}):
+        started = time.perf_counter()
+        for data in targets:
+            success, response, status = ReviewAPI.create_review(data)
+            assert success, response
+        return (time.perf_counter() - started) / calls
+
+def run_scale(app, scale, repeat, host=None):
+    """Return {benchmark: {'seconds', 'items', 'per_item_us'}} for one scale"""
+    connect(host)
+    users, packages = seed(scale)
+    bookings, reviews = list(Booking.objects()), list(Review.objects())
+    benchmarks = {
+        'dereferenceBookings': (lambda: Booking.dereferenceBookings(bookings), scale),
+        'dereferenceReviews': (lambda: Review.dereferenceReviews(reviews), scale),
+        'extract_keys': (lambda: [extract_keys(row, i) for i, row in enumerate(packages)], scale),
+        'getAllPackages_legacy': (lambda: app.json.dumps({'data': legacy_packages()}), scale),
+        'getAllPackages_projected': (lambda: app.json.dumps({'data': projected_packages()}), scale),
+        # what dashboard.trend_chart runs by default
+        'trend_rollup_day': (lambda: HotelDailyCost.getTrend(granularity='day'), scale),
+        'trend_rollup_month': (lambda: HotelDailyCost.getTrend(granularity='month'), scale),
+        'trend_aggregate_month': (lambda: Booking.costByHotelAndDate(granularity='month'), scale),
+    }
+    results = {}
+    for name, (fn, items) in benchmarks.items():
+        try:
+            seconds = min(timeit.repeat(fn, number=1, repeat=repeat))
+        except UNSUPPORTED as e:  # operators mongomock lacks
+            results[name] = {'error': f"not supported by mongomock, use --host: {e}"}
+            continue
+        results[name] = {'seconds': seconds, 'items': items, 'per_item_us': seconds / items * 1e6}
+    calls = min(CREATE_REVIEW_CALLS, scale)
+    seconds = create_reviews(app, users[0], packages, calls)
+    results['create_review'] = {'seconds': seconds, 'items': 1, 'per_item_us': seconds * 1e6}
+    return results
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def regressions(results, baseline, tolerance):
+    """Messages for benchmarks slower than in baseline by more than tolerance (0.25 = 25%)"""
+    problems = []
+    for scale, benchmarks in results['results'].items():
+        for name, result in benchmarks.items():
+            before = baseline.get('results', {}).get(scale, {}).get(name, {}).get('seconds')
+            if before and 'seconds' in result and result['seconds'] > before * (1 + tolerance):
+                problems.append(f"{name} @ {scale}: {result['seconds']:.4f}s, was {before:.4f}s "
+                                f"({result['seconds'] / before:.2f}x)")
+    return problems
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', default='1000,10000,100000', help="comma separated document counts")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per benchmark, the fastest is kept")
+    parser.add_argument('--output', default='microbench.json', help="where to write the results")
+    parser.add_argument('--compare', help="earlier results to check for regressions")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed slowdown against --compare")
+    parser.add_argument('--host', help="Mongo URI to benchmark against instead of mongomock "
+                                       f"(its {DB_NAME} database is dropped)")
+    args = parser.parse_args(argv)
+    if not args.host and mongomock is None:
+        parser.error("needs mongomock (pip install mongomock) or --host")
+
+    app = create_app()
+    results = {'commit': git_commit(), 'date': datetime.utcnow().isoformat(timespec='seconds'),
+               'python': platform.python_version(), 'backend': 'mongod' if args.host else 'mongomock', 'results': {}}
+    with app.app_context():
+        for scale in (int(value) for value in args.scales.split(',')):
+            results['results'][str(scale)] = run_scale(app, scale, args.repeat, args.host)
+            for name, result in results['results'][str(scale)].items():
+                print(f"{scale:>8} {name:<26} " + (f"{result['seconds']:.4f}s {result['per_item_us']:.1f}us/item"
+                                                   if 'seconds' in result else result['error']))
+    with open(args.output, 'w') as file:
+        json.dump(results, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            problems = regressions(results, json.load(file), args.tolerance)
+        for problem in problems:
+            print(f"REGRESSION {problem}", file=sys.stderr)
+        return 1 if problems else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,103 @@
+import json
+import base64
+import pytest
+from app.models.users import User
+from app.models.package import Package
+from app.models.book import Booking
+from app.models.token import UserTokens, token_cache
+from app.models.trend import HotelDailyCost
+from app.utils.api_auth import generate_user_token
+from app.utils.monitoring import count_commands
+from werkzeug.security import generate_password_hash
+
+EMAIL = "roundtrip@bench.com"
+HOTEL = "Roundtrip Hotel"
+
+def legacy_create_booking(check_in_date, customer, package):
+    """The booking creation path before the single-write change: insert, then update total_cost"""
+    booking = Booking(check_in_date=check_in_date, customer=customer, package=package).save()
+    booking.calculate_total_cost()
+    HotelDailyCost.addBooking(package.hotel_name, check_in_date, booking.total_cost)
+    return booking
+
+class TestBookingRoundTrips:
+    """Mongo round-trips per booking, before and after the single-write createBooking"""
+
+    @pytest.fixture(autouse=True)
+    def setup_data(self, client):
+        hashpass = generate_password_hash("12345", method='sha256')
+        self.user = User.createUser(email=EMAIL, password=hashpass, name="Roundtrip User")
+        self.package = Package.createPackage(hotel_name=HOTEL, duration=2, unit_cost=100.0,
+                                             image_url="x", description="Benchmark hotel")
+        success, self.token, error = generate_user_token(EMAIL, "12345")
+        # warm up index creation and the package, token and session user caches so only per-booking work is counted
+        Booking.createBooking("2030-01-01", self.user, Package.getPackage(HOTEL))
+        UserTokens.getCachedToken(EMAIL)
+        User.getSessionUser(self.user.id)
+        yield
+        Booking.objects(customer=self.user).delete()
+        HotelDailyCost.objects(hotel_name=HOTEL).delete()
+        UserTokens.objects(email=EMAIL).delete()
+        token_cache.invalidate(EMAIL)
+        Package.objects(hotel_name=HOTEL).delete()
+        User.objects(email=EMAIL).delete()
+        Package.invalidateCache()
+
+    def test_create_booking_roundtrips(self):
+        """
+        GIVEN a customer and an already loaded package
+        WHEN a booking is created with the legacy path and with Booking.createBooking
+        THEN createBooking should need fewer round-trips (one insert plus the trend rollup upsert)
+        """
+        with count_commands() as before:
+            legacy_create_booking("2030-01-02", self.user, self.package)
+        with count_commands() as after:
+            booking = Booking.createBooking("2030-01-03", self.user, self.package)
+
+        assert booking.total_cost == 200.0
+        assert after.count('insert') == 1 and 'update' in before
+        assert len(after) < len(before)
+
+    def test_api_new_booking_roundtrips(self, client, monkeypatch):
+        """
+        GIVEN an authenticated API user whose token is already cached
+        WHEN POST /api/book/newBooking is called with the legacy booking path and with createBooking
+        THEN the request should need fewer round-trips, at most the user lookup, the insert and the rollup upsert
+        """
+        credentials = base64.b64encode(f"{EMAIL}:{self.token}".encode('utf-8')).decode('utf-8')
+        headers = {'Authorization': f'Basic {credentials}'}
+
+        with monkeypatch.context() as patch:
+            patch.setattr(Booking, 'createBooking', staticmethod(legacy_create_booking))
+            with count_commands() as before:
+                response = client.post('/api/book/newBooking', headers=headers,
+                                       json={'check_in_date': '2030-01-04', 'user_email': EMAIL, 'hotel_name': HOTEL})
+        assert response.status_code == 201
+        with count_commands() as after:
+            response = client.post('/api/book/newBooking', headers=headers,
+                                   json={'check_in_date': '2030-01-05', 'user_email': EMAIL, 'hotel_name': HOTEL})
+
+        assert response.status_code == 201
+        assert len(after) < len(before)
+        assert len(after) <= 3
+
+    def test_book_page_roundtrips(self, client, monkeypatch):
+        """
+        GIVEN a logged-in browser session whose user is already cached
+        WHEN POST /book is called with the legacy booking path and with createBooking
+        THEN the request should need fewer round-trips, at most the insert and the rollup upsert
+        """
+        with client.session_transaction() as session:
+            session['_user_id'] = str(self.user.id)
+
+        with monkeypatch.context() as patch:
+            patch.setattr(Booking, 'createBooking', staticmethod(legacy_create_booking))
+            with count_commands() as before:
+                response = client.post('/book', data={'hotel_name': HOTEL, 'check_in_date': '2030-01-06'})
+        assert response.status_code == 302
+        with count_commands() as after:
+            response = client.post('/book', data={'hotel_name': HOTEL, 'check_in_date': '2030-01-07'})
+
+        assert response.status_code == 302
+        assert len(after) < len(before)
+        assert len(after) <= 2
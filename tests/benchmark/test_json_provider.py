@@ -0,0 +1,39 @@
+import timeit
+import pytest
+from datetime import datetime, timedelta
+from bson import ObjectId
+from werkzeug.http import http_date
+from flask import current_app
+from app.utils.json_provider import OrjsonProvider, StdlibJSONProvider
+
+pytest.importorskip("orjson")
+
+ROWS = 10000
+
+def make_payload(n):
+    """Shaped like Booking.dereferenceBookings / Review.dereferenceReviews output"""
+    start = datetime(2030, 1, 1)
+    return {"message": "Booking retrieved successfully", "data": [{
+        "check_in_date": start + timedelta(days=i % 365),
+        "customer": f"user{i % 500}@example.com",
+        "package": f"Hotel {i % 50}",
+        "total_cost": 240.0 + i % 7,
+        "review": ObjectId(),
+    } for i in range(n)]}
+
+def test_json_provider_speed():
+    """
+    GIVEN a large booking payload with datetimes and ObjectIds
+    WHEN it is serialized by the stdlib and the orjson providers
+    THEN both produce the same JSON (the timings are only reported, as they vary between machines)
+    """
+    payload = make_payload(ROWS)
+    app = current_app._get_current_object()
+    stdlib, fast = StdlibJSONProvider(app), OrjsonProvider(app)
+    assert fast.loads(fast.dumps(payload)) == stdlib.loads(stdlib.dumps(payload))
+    moment = datetime(2030, 1, 5, 13, 4, 5)
+    assert fast.dumps(moment) == stdlib.dumps(moment) == f'"{http_date(moment)}"'
+
+    before = min(timeit.repeat(lambda: stdlib.dumps(payload), number=1, repeat=5))
+    after = min(timeit.repeat(lambda: fast.dumps(payload), number=1, repeat=5))
+    print(f"\n{ROWS} rows: stdlib {before * 1000:.1f}ms, orjson {after * 1000:.1f}ms ({before / after:.1f}x)")
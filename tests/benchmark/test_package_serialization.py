@@ -0,0 +1,55 @@
+import json
+import timeit
+from bson import ObjectId, json_util
+from app.models.package import Package
+from app.utils.api import extract_keys, PACKAGE_KEYS
+from app.utils.monitoring import count_commands
+
+PACKAGES = 500
+REPEAT = 5
+
+def make_documents(n):
+    return [Package(id=ObjectId(), hotel_name=f"Hotel {i}", duration=3, unit_cost=120.5,
+                    image_url=f"hotel{i}.jpg", description="A quiet stay by the sea. " * 10)
+            for i in range(n)]
+
+def legacy_serialize(packages):
+    """getAllPackages before projection: Document -> to_mongo -> BSON JSON -> dict -> extract_keys"""
+    packages_list = [json.loads(json_util.dumps(package.to_mongo())) for package in packages]
+    return [extract_keys(k, idx+1) for idx, k in enumerate(packages_list)]
+
+def projected_serialize(rows):
+    """getAllPackages now: as_pymongo() dicts of the projected fields -> extract_keys"""
+    return [extract_keys(k, idx+1) for idx, k in enumerate(rows)]
+
+def per_package_us(fn, data):
+    return min(timeit.repeat(lambda: fn(data), number=1, repeat=REPEAT)) / len(data) * 1e6
+
+def test_package_serialization_cost():
+    """
+    GIVEN the package list served by /api/package/getAllPackages
+    WHEN it is serialized from Documents (old path) and from projected pymongo dicts (new path)
+    THEN both give the same payload (the timings are only reported, as they vary between machines)
+    """
+    documents = make_documents(PACKAGES)
+    rows = [{key: doc[key] for key in ("hotel_name", "duration", "unit_cost", "image_url", "description")}
+            for doc in documents]
+    assert legacy_serialize(documents) == projected_serialize(rows)
+
+    before = per_package_us(legacy_serialize, documents)
+    after = per_package_us(projected_serialize, rows)
+    print(f"\nper-package serialization: before {before:.2f}us, after {after:.2f}us ({before / after:.1f}x)")
+
+def test_package_summaries_queries():
+    """
+    GIVEN an empty package cache
+    WHEN the package summaries are read twice
+    THEN only the projected fields are returned, with one query and then none
+    """
+    Package.invalidateCache()
+    with count_commands() as first:
+        summaries = Package.getPackageSummaries()
+    with count_commands() as second:
+        assert Package.getPackageSummaries() is summaries
+    assert all(set(row) <= set(PACKAGE_KEYS) for row in summaries)
+    assert len(first) <= 1 and len(second) == 0
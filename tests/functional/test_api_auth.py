@@ -189,6 +189,46 @@ class TestAPIAuthentication:
             print(f"Protected endpoint test error: {e}")
             raise
 
+    def test_protected_endpoint_after_token_revoked(self, client):
+        """
+        GIVEN a token that has already been used (and so is cached)
+        WHEN the token is revoked
+        THEN the next request with it should return 401 Unauthorized
+        """
+        hashpass = generate_password_hash("12345", method='sha256')
+        User.createUser(email="revokeuser@example.com", password=hashpass, name="Revoke User")
+        success, token, error = generate_user_token("revokeuser@example.com", "12345")
+        assert success == True
+
+        credentials = base64.b64encode(f"revokeuser@example.com:{token}".encode('utf-8')).decode('utf-8')
+        headers = {'Authorization': f'Basic {credentials}'}
+
+        response = client.get('/api/protected', headers=headers)
+        assert response.status_code == 201
+
+        assert UserTokens.revokeToken("revokeuser@example.com") == True
+        response = client.get('/api/protected', headers=headers)
+        assert response.status_code == 401
+
+    def test_token_created_in_another_worker(self, client):
+        """
+        GIVEN a request that found no token for a user
+        WHEN a token is then stored without going through this worker's cache
+        THEN the next request with it should be authenticated
+        """
+        credentials = base64.b64encode("otherworker@example.com:othertoken".encode('utf-8')).decode('utf-8')
+        headers = {'Authorization': f'Basic {credentials}'}
+
+        response = client.get('/api/protected', headers=headers)
+        assert response.status_code == 401
+
+        UserTokens._get_collection().insert_one({'email': "otherworker@example.com", 'token': "othertoken"})
+        try:
+            response = client.get('/api/protected', headers=headers)
+            assert response.status_code == 201
+        finally:
+            UserTokens.revokeToken("otherworker@example.com")
+
     def test_protected_endpoint_without_token(self, client):
         """
         GIVEN no authentication token
@@ -1,6 +1,7 @@
 import json
 import base64
 import os
+from flask import g
 from app.models.users import User
 from werkzeug.security import generate_password_hash
 
@@ -153,4 +154,76 @@ def test_gettoken_and_delete_booking_with_fixture(client):
     headers = {'Authorization': f'Basic {credentials}'}
     response = client.post('api/book/deleteBooking', headers=headers, json=data)
     assert response.status_code == 201
-    # print(response.status_code)
\ No newline at end of file
+    # print(response.status_code)
+
+def test_trend_chart_window_and_granularity_with_fixture(client):
+    """
+    GIVEN a Flask application configured for testing
+    WHEN the '/trend_chart' request path is posted with a date window and granularity
+    THEN check that the aggregated series is returned, and that an unknown granularity is rejected
+    """
+    data = {'from_date': '2021-01-01', 'to_date': '2021-12-31', 'granularity': 'month'}
+    for mode in ('rollup', 'aggregate'):
+        response = client.post('/trend_chart', data=dict(data, mode=mode))
+        assert response.status_code == 200
+        response_data = json.loads(response.text)
+        assert 'chartDim' in response_data
+
+    response = client.post('/trend_chart', data={'granularity': 'fortnight'})
+    assert response.status_code == 400
+
+def test_metrics_endpoint_with_fixture(client):
+    """
+    GIVEN a Flask application configured for testing
+    WHEN a page is requested and then the '/metrics' page is requested (GET)
+    THEN check that the page's latency, Mongo command count and response size are exposed
+    """
+    client.get('/')
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert b'staycation_request_duration_seconds_bucket{endpoint="packageController.packages",method="GET",le="+Inf"}' in response.data
+    assert b'staycation_request_mongo_commands_count{endpoint="packageController.packages",method="GET"}' in response.data
+    assert b'staycation_response_size_bytes_sum{endpoint="packageController.packages",method="GET"}' in response.data
+
+def test_conditional_get_packages_with_fixture(client):
+    """
+    GIVEN a Flask application configured for testing
+    WHEN the '/packages' page and '/api/package/getAllPackages' are requested again with the returned ETag
+    THEN check that '304' (Not Modified) is returned without a body, and the API response stays private
+    """
+    # the session-wide app context keeps Flask-Login's user in g between tests
+    g.pop('_login_user', None)
+    response = client.get('/packages')
+    assert response.status_code == 200
+    assert response.headers['ETag']
+    assert 'public' in response.headers['Cache-Control']
+    response = client.get('/packages', headers={'If-None-Match': response.headers['ETag']})
+    assert response.status_code == 304
+    assert response.data == b''
+
+    useremail = 'peter@cde.com'
+    hashpass = generate_password_hash("12345", method='sha256')
+    User.createUser(email=useremail, password=hashpass, name="Peter Test")
+    token = json.loads(client.post("api/user/gettoken", json={'email': useremail, 'password': '12345'}).text)['token']
+    credentials = base64.b64encode(f"{useremail}:{token}".encode('utf-8')).decode('utf-8')
+    headers = {'Authorization': f'Basic {credentials}'}
+    response = client.get('api/package/getAllPackages', headers=headers)
+    assert response.status_code == 201
+    assert 'private' in response.headers['Cache-Control']
+    response = client.get('api/package/getAllPackages', headers=dict(headers, **{'If-None-Match': response.headers['ETag']}))
+    assert response.status_code == 304
+
+def test_package_fragments_cached_with_fixture(client):
+    """
+    GIVEN a Flask application configured for testing
+    WHEN the '/packages' and '/viewPackageDetail/<hotel_name>' pages are requested twice
+    THEN check that the second renders reuse the cached package fragments and produce the same pages
+    """
+    from app.utils.fragments import fragment_cache
+    fragment_cache.invalidate()
+    first = [client.get('/packages').data, client.get('/viewPackageDetail/Capella Singapore').data]
+    hits = fragment_cache.stats()['hits']
+    second = [client.get('/packages').data, client.get('/viewPackageDetail/Capella Singapore').data]
+    assert fragment_cache.stats()['hits'] == hits + 2
+    assert first == second
+    assert b"Capella Singapore" in second[0] and b"Capella Singapore" in second[1]
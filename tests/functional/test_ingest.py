@@ -0,0 +1,101 @@
+import io
+import pytest
+from datetime import datetime, timedelta
+from app.models.users import User
+from app.models.package import Package
+from app.models.book import Booking
+from app.models.trend import HotelDailyCost
+from app.models.job import UploadJob
+from app.utils.ingest import read_csv, ingest_users, ingest_packages, ingest_bookings
+from app.utils.jobs import work
+
+class TestCsvIngestion:
+    """Test cases for the batched /upload ingestion"""
+
+    @pytest.fixture(autouse=True)
+    def cleanup(self):
+        yield
+        Booking.objects(customer__in=User.objects(email__endswith="@ingest.com")).delete()
+        User.objects(email__endswith="@ingest.com").delete()
+        Package.objects(hotel_name__startswith="Ingest Hotel").delete()
+        HotelDailyCost.objects(hotel_name__startswith="Ingest Hotel").delete()
+        Package.invalidateCache()
+
+    def test_ingest_users_packages_and_bookings(self):
+        """
+        GIVEN CSV files in the /upload format, some rows invalid
+        WHEN they are ingested with a small batch size
+        THEN valid rows are inserted, invalid rows are reported with their line number
+        """
+        users = b'email,password,name\nann@ingest.com,12345,"Ann"\nbob@ingest.com,12345,"Bob"\nann@ingest.com,12345,"Ann again"\n'
+        report = ingest_users(read_csv(io.BytesIO(users)), batch_size=2)
+        assert (report.rows, report.inserted, report.failed) == (3, 2, 1)
+        assert report.errors[0]['row'] == 4
+
+        packages = b'hotel_name,duration,unit_cost,image_url,description\n"Ingest Hotel",2,100.0,x,"A hotel"\n"Ingest Hotel 2",two,100.0,x,"Bad duration"\n'
+        report = ingest_packages(read_csv(io.BytesIO(packages)))
+        assert (report.inserted, report.failed) == (1, 1)
+
+        bookings = (b'check_in_date,customer,hotel_name\n'
+                    b'2022-01-27,ann@ingest.com,"Ingest Hotel"\n'
+                    b'2022-01-27,bob@ingest.com,"Ingest Hotel"\n'
+                    b'2022-01-28,nobody@ingest.com,"Ingest Hotel"\n'
+                    b'2022-13-01,ann@ingest.com,"Ingest Hotel"\n')
+        report = ingest_bookings(read_csv(io.BytesIO(bookings)), batch_size=2)
+        assert (report.rows, report.inserted, report.failed) == (4, 2, 2)
+        assert [error['row'] for error in report.errors] == [4, 5]
+
+        booking = Booking.objects(customer=User.getUser("ann@ingest.com")).first()
+        assert booking.total_cost == 200.0
+        trend = HotelDailyCost.objects(hotel_name="Ingest Hotel").first()
+        assert (trend.total_cost, trend.count) == (400.0, 2)
+
+    def test_upload_job_processed_by_worker(self):
+        """
+        GIVEN a CSV queued as an upload job
+        WHEN the worker drains the queue
+        THEN the job is done and reports the rows it processed
+        """
+        users = b'email,password,name\ncarl@ingest.com,12345,"Carl"\n,12345,"No email"\n'
+        job = UploadJob.enqueue("Users", io.BytesIO(users), submitted_by="admin@ingest.com")
+        assert job.toStatus()['status'] == 'queued'
+
+        work(once=True)
+
+        status = UploadJob.getJob(str(job.id)).toStatus()
+        UploadJob.objects(pk=job.id).delete()
+        assert status['status'] == 'done'
+        assert (status['rows'], status['inserted'], status['failed']) == (2, 1, 1)
+        assert User.getUser("carl@ingest.com") is not None
+
+    def test_stalled_job_is_claimed_again(self):
+        """
+        GIVEN a running job whose worker stopped sending heartbeats and one that is still progressing
+        WHEN a worker claims the next job
+        THEN only the stalled job is claimed again, with its attempts counted
+        """
+        now = datetime.utcnow()
+        stalled = UploadJob(datatype="Users", status='running', updated=now - timedelta(hours=1), attempts=1).save()
+        alive = UploadJob(datatype="Users", status='running', updated=now, attempts=1).save()
+        try:
+            claimed = UploadJob.claimNext(stall_timeout=600)
+            assert claimed.id == stalled.id and claimed.attempts == 2
+            assert UploadJob.claimNext(stall_timeout=600) is None
+        finally:
+            UploadJob.objects(pk__in=[stalled.id, alive.id]).delete()
+
+    def test_failed_job_drops_its_csv(self):
+        """
+        GIVEN a queued upload job with its CSV in GridFS
+        WHEN the job fails
+        THEN the job is reported as failed and its CSV is deleted
+        """
+        job = UploadJob.enqueue("Users", io.BytesIO(b'email,password,name\n'), submitted_by="admin@ingest.com")
+        grid_id = job.file.grid_id
+        try:
+            job.fail("Broken CSV")
+            job = UploadJob.getJob(str(job.id))
+            assert job.toStatus()['status'] == 'failed' and not job.file
+            assert UploadJob._get_db()['fs.files'].find_one({'_id': grid_id}) is None
+        finally:
+            UploadJob.objects(pk=job.id).delete()
@@ -6,7 +6,9 @@ from app.models.package import Package
 from app.models.book import Booking
 from app.models.review import Review
 from app.models.token import UserTokens
+from app.models.rating import PackageRating
 from app.utils.api_auth import generate_user_token
+from app.utils.profiler import query_budget
 from werkzeug.security import generate_password_hash
 from datetime import datetime, timedelta
 
@@ -49,6 +51,7 @@ class TestReviewApiFunction:
         
         # Cleanup after each test
         Review.objects().delete()
+        PackageRating.objects().delete()
         Booking.objects().delete()
         Package.objects().delete()
         User.objects().delete()
@@ -204,6 +207,154 @@ class TestReviewApiFunction:
         
         assert response.status_code == 401
 
+    def test_get_all_reviews_query_budget(self, client):
+        """
+        GIVEN several reviews exist in the system
+        WHEN retrieving all reviews
+        THEN customers and packages should be fetched once per collection, not once per review
+        """
+        for i in range(5):
+            Review.createReview(
+                customer=self.test_user,
+                package=self.test_package,
+                booking=self.test_booking,
+                rating=i % 5 + 1,
+                title=f"Review {i + 1}",
+                comment=f"Comment {i + 1}"
+            )
+
+        # token lookup, reviews page, users $in, packages $in
+        with query_budget(4, max_repeats=1):
+            response = client.post(
+                "/api/review/getAllReviews",
+                headers=self.get_auth_headers()
+            )
+
+        assert response.status_code == 200
+
+    def test_create_review_query_budget(self, client):
+        """
+        GIVEN a user whose token, id and package are already cached by an earlier request
+        WHEN creating a review
+        THEN the booking and any existing review should be found with one query
+        """
+        data = {"user_email": "reviewuser@example.com", "hotel_name": "Test Hotel", "check_in_date": "2025-10-11"}
+        response = client.post(
+            "/api/review/getReviewByBooking",
+            headers=self.get_auth_headers(),
+            json=data
+        )
+        assert response.status_code == 404
+
+        # booking + review $lookup, review insert, rating summary upsert
+        with query_budget(3, max_repeats=1):
+            response = client.post(
+                "/api/review/createReview",
+                headers=self.get_auth_headers(),
+                json=dict(data, rating=4, title="Nice", comment="Good stay")
+            )
+
+        assert response.status_code == 201
+        assert Review.objects(booking=self.test_booking).count() == 1
+
+    def test_create_review_after_user_registered_again(self, client):
+        """
+        GIVEN a cached user id whose account was deleted in bulk and registered again with a booking
+        WHEN creating a review
+        THEN the review should be created for the new account instead of failing on the stale id
+        """
+        assert User.getUserId("reviewuser@example.com") == self.test_user.pk
+        Booking.objects().delete()
+        User.objects(email="reviewuser@example.com").delete()
+        User._get_collection().insert_one({'email': "reviewuser@example.com", 'name': "Review Test User"})
+        user = User.objects(email="reviewuser@example.com").first()
+        Booking.createBooking(check_in_date="2025-10-11", customer=user, package=self.test_package)
+
+        response = client.post(
+            "/api/review/createReview",
+            headers=self.get_auth_headers(),
+            json={"hotel_name": "Test Hotel", "check_in_date": "2025-10-11", "rating": 4,
+                  "title": "Nice", "comment": "Good stay"}
+        )
+
+        assert response.status_code == 201
+        assert Review.objects(customer=user).count() == 1
+
+    def test_get_all_reviews_paginated(self, client):
+        """
+        GIVEN multiple reviews exist in the system
+        WHEN retrieving reviews with a limit and following the 'next' cursor
+        THEN should return every review exactly once across the pages
+        """
+        for i in range(3):
+            Review.createReview(
+                customer=self.test_user,
+                package=self.test_package,
+                booking=self.test_booking,
+                rating=i + 1,
+                title=f"Review {i + 1}",
+                comment=f"Comment {i + 1}"
+            )
+
+        titles = []
+        data = {"limit": 2}
+        while True:
+            response = client.post(
+                "/api/review/getAllReviews",
+                json=data,
+                headers=self.get_auth_headers()
+            )
+            assert response.status_code == 200
+            response_data = json.loads(response.text)
+            titles += [review["title"] for review in response_data["data"]]
+            if not response_data["next"]:
+                break
+            data = {"limit": 2, "after": response_data["next"]}
+
+        assert titles == ["Review 1", "Review 2", "Review 3"]
+
+    def test_get_all_reviews_invalid_cursor(self, client):
+        """
+        GIVEN a malformed 'after' cursor
+        WHEN retrieving reviews
+        THEN should return 400 Bad Request
+        """
+        response = client.post(
+            "/api/review/getAllReviews",
+            json={"after": "not-a-cursor"},
+            headers=self.get_auth_headers()
+        )
+
+        assert response.status_code == 400
+
+    def test_get_all_reviews_stream(self, client):
+        """
+        GIVEN multiple reviews exist in the system
+        WHEN retrieving reviews as an NDJSON stream
+        THEN should return one JSON review per line
+        """
+        for i in range(3):
+            Review.createReview(
+                customer=self.test_user,
+                package=self.test_package,
+                booking=self.test_booking,
+                rating=i + 1,
+                title=f"Review {i + 1}",
+                comment=f"Comment {i + 1}"
+            )
+
+        response = client.post(
+            "/api/review/getAllReviews",
+            json={"stream": True},
+            headers=self.get_auth_headers()
+        )
+
+        assert response.status_code == 200
+        assert response.mimetype == "application/x-ndjson"
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [review["title"] for review in lines] == ["Review 1", "Review 2", "Review 3"]
+        assert lines[0]["customer"] == "reviewuser@example.com"
+
     def test_update_review_success(self, client):
         """
         GIVEN an existing review
@@ -336,6 +487,52 @@ class TestReviewApiFunction:
         deleted_review = Review.objects(booking=self.test_booking).first()
         assert deleted_review is None
 
+    def test_rating_summary_maintained(self, client):
+        """
+        GIVEN a package with a booking
+        WHEN its review is created, re-rated and deleted through the API
+        THEN the package's rating summary and average follow each change, and reconcile finds nothing to fix
+        """
+        review_data = {"hotel_name": "Test Hotel", "check_in_date": "2025-10-11",
+                       "rating": 5, "title": "Excellent stay!", "comment": "Great service."}
+        assert client.post("/api/review/createReview", json=review_data, headers=self.get_auth_headers()).status_code == 201
+        assert PackageRating.getSummary(self.test_package.pk) == {'count': 1, 'average': 5, 'histogram': [0, 0, 0, 0, 1]}
+
+        review_data["rating"] = 3
+        assert client.post("/api/review/updateReview", json=review_data, headers=self.get_auth_headers()).status_code == 200
+        assert PackageRating.getSummary(self.test_package.pk) == {'count': 1, 'average': 3, 'histogram': [0, 0, 1, 0, 0]}
+        assert Review.getPackageAverageRating("Test Hotel") == 3
+        assert PackageRating.reconcile() == 0
+
+        assert client.post("/api/review/deleteReview", json=review_data, headers=self.get_auth_headers()).status_code == 200
+        assert PackageRating.getSummary(self.test_package.pk)['count'] == 0
+        assert Review.getPackageAverageRating("Test Hotel") == 0
+
+    def test_rating_summary_reconcile(self, client):
+        """
+        GIVEN reviews written without the model hooks (e.g. a bulk import)
+        WHEN the rating summaries are reconciled
+        THEN the package's summary is recounted from its reviews
+        """
+        Review(customer=self.test_user, package=self.test_package, booking=self.test_booking,
+               rating=4, title="Imported", comment="Written directly").save()
+        assert PackageRating.getSummary(self.test_package.pk)['count'] == 0
+
+        assert PackageRating.reconcile() == 1
+        assert PackageRating.getSummary(self.test_package.pk) == {'count': 1, 'average': 4, 'histogram': [0, 0, 0, 1, 0]}
+        assert PackageRating.reconcile() == 0
+
+        # deleting a review the summary never counted does not make it negative
+        PackageRating.objects().delete()
+        PackageRating.removeRating(self.test_package.pk, 4)
+        assert PackageRating.objects().count() == 0
+
+        # a summary left over from reviews removed in bulk is emptied and dropped
+        PackageRating.addRating(self.test_package.pk, 4)
+        Review.objects().delete()
+        assert PackageRating.reconcile() == 1
+        assert PackageRating.objects().count() == 0
+
     def test_delete_review_not_found(self, client):
         """
         GIVEN no existing review for the booking
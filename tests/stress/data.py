@@ -0,0 +1,53 @@
+"""
+Deterministic data for the load suite: the same LOAD_SEED gives the same accounts,
+hotels, dates and reviews on every run, so results are comparable between runs.
+"""
+import os
+import random
+from datetime import date, timedelta
+
+SEED = int(os.getenv('LOAD_SEED', '381'))
+USERS = int(os.getenv('LOAD_USERS', '200'))
+PASSWORD = os.getenv('LOAD_PASSWORD', 'load12345')
+# bookings made by the load test are far in the future, away from real data
+FIRST_CHECK_IN = date(2031, 1, 1)
+
+# the catalogue restored from db_seed/
+HOTELS = ["Shangri-La Singapore", "Capella Singapore", "W Singapore - Sentosa Cove", "York Hotel Singapore",
+          "Studio M", "Singapore Marriott Tang Plaza Hotel"]
+TITLES = ["Great stay", "Lovely staff", "Would come back", "Decent value", "Not as pictured"]
+COMMENTS = ["Room was clean and quiet.", "Breakfast could be better.", "Pool was amazing.",
+            "Check-in took a while.", "Perfect for a weekend away."]
+THEMES = ["Family", "Romantic", "Wellness", "Adventure", "Foodie"]
+
+def user_email(index):
+    return f"load{index:05d}@staycation.test"
+
+def user_rows(count=USERS):
+    """CSV-style (line, row) items of the load test accounts, as accepted by app.utils.ingest"""
+    for index in range(count):
+        yield index + 2, {'email': user_email(index), 'password': PASSWORD, 'name': f"Load User {index}"}
+
+class UserData:
+    """Per virtual user stream of check-in dates, hotels and reviews"""
+
+    def __init__(self, index):
+        self.email = user_email(index % USERS)
+        self.rng = random.Random(SEED * 1000003 + index)
+        # virtual users sharing an account (more users than LOAD_USERS) book in different decades
+        self.next_check_in = FIRST_CHECK_IN + timedelta(days=3653 * (index // USERS))
+
+    def check_in_date(self):
+        """A new, strictly increasing check-in date (YYYY-MM-DD)"""
+        self.next_check_in += timedelta(days=self.rng.randint(1, 3))
+        return self.next_check_in.isoformat()
+
+    def hotel(self, hotel_names):
+        return self.rng.choice(hotel_names)
+
+    def review(self):
+        # skewed towards good ratings, like real reviews
+        return {'rating': self.rng.choices([1, 2, 3, 4, 5], weights=[1, 1, 2, 4, 6])[0],
+                'title': self.rng.choice(TITLES),
+                'comment': self.rng.choice(COMMENTS),
+                'suggested_theme': self.rng.choice(THEMES)}
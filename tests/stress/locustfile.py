@@ -1,8 +1,162 @@
-from locust import HttpUser, task
-from random import randint
-
-class AwesomeApplication(HttpUser):
-    @task
-    def hello(self):
-        self.client.get("/")
-          
\ No newline at end of file
+"""
+Load test of the pages and the booking and review APIs.
+
+Seed the accounts first (tests/stress/seed.py), then run headless, e.g.
+
+    locust -f tests/stress/locustfile.py --headless -u 50 -r 5 -t 5m --host http://localhost:5000
+
+The run exits with 1 when an endpoint goes over its p95 latency or error rate budget
+(tests/stress/budgets.json, LOAD_BUDGETS to use another file).
+"""
+import base64
+import itertools
+import json
+import os
+import sys
+from locust import HttpUser, between, events, task
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from data import HOTELS, PASSWORD, UserData
+
+BUDGETS = os.getenv('LOAD_BUDGETS', os.path.join(os.path.dirname(__file__), 'budgets.json'))
+# every virtual user in this process gets its own index, hence its own account and data stream
+user_index = itertools.count()
+
+class ApiUser(HttpUser):
+    """Base class: gets a token for its account and keeps the catalogue's hotel names"""
+    abstract = True
+    wait_time = between(0.5, 2)
+
+    def on_start(self):
+        self.data = UserData(next(user_index))
+        self.bookings = []
+        response = self.client.post('/api/user/gettoken', json={'email': self.data.email, 'password': PASSWORD},
+                                    name='gettoken')
+        token = response.json()['token']
+        credentials = base64.b64encode(f"{self.data.email}:{token}".encode('utf-8')).decode('utf-8')
+        self.headers = {'Authorization': f'Basic {credentials}'}
+        self.hotels = [package['hotel_name'] for package in self.get_packages().json()['data']]
+
+    def post(self, path, name, **kwargs):
+        return self.client.post(path, headers=self.headers, name=name, **kwargs)
+
+    def get_packages(self):
+        return self.post('/api/package/getAllPackages', 'getAllPackages', json={})
+
+    def new_booking(self):
+        booking = {'user_email': self.data.email, 'hotel_name': self.data.hotel(self.hotels),
+                   'check_in_date': self.data.check_in_date()}
+        if self.post('/api/book/newBooking', 'newBooking', json=booking).status_code == 201:
+            self.bookings.append(booking)
+        return booking
+
+class BrowsingUser(HttpUser):
+    """Anonymous visitors of the package pages and the trend chart"""
+    weight = 6
+    wait_time = between(1, 3)
+
+    def on_start(self):
+        self.data = UserData(next(user_index))
+
+    @task(6)
+    def home(self):
+        self.client.get('/', name='/')
+
+    @task(3)
+    def package_detail(self):
+        hotel = self.data.hotel(HOTELS)
+        self.client.get(f'/viewPackageDetail/{hotel}', name='/viewPackageDetail/<hotel_name>')
+
+    @task(1)
+    def trend_chart(self):
+        self.client.post('/trend_chart', name='/trend_chart',
+                         data={'from_date': '2021-01-01', 'to_date': '2021-12-31', 'granularity': 'week'})
+
+class BookingUser(ApiUser):
+    """API clients listing packages and making, changing and cancelling bookings"""
+    weight = 3
+
+    @task(5)
+    def get_all_packages(self):
+        self.get_packages()
+
+    @task(3)
+    def manage_bookings(self):
+        self.post('/api/book/manageBooking', 'manageBooking', json={'user_email': self.data.email})
+
+    @task(2)
+    def new_booking(self):
+        super().new_booking()
+
+    @task(1)
+    def update_booking(self):
+        if not self.bookings:
+            return
+        booking = self.bookings.pop(0)
+        new_check_in_date = self.data.check_in_date()
+        response = self.post('/api/book/updateBooking', 'updateBooking', json={
+            'user_email': self.data.email, 'hotel_name': booking['hotel_name'],
+            'old_check_in_date': booking['check_in_date'], 'new_check_in_date': new_check_in_date})
+        if response.status_code == 201:
+            self.bookings.append(dict(booking, check_in_date=new_check_in_date))
+
+    @task(1)
+    def delete_booking(self):
+        if self.bookings:
+            self.post('/api/book/deleteBooking', 'deleteBooking', json=dict(self.bookings.pop(0)))
+
+class ReviewUser(ApiUser):
+    """API clients reviewing their stays and reading reviews"""
+    weight = 1
+
+    @task(4)
+    def get_all_reviews(self):
+        self.post('/api/review/getAllReviews', 'getAllReviews', json={'limit': 50})
+
+    @task(2)
+    def create_review(self):
+        booking = self.new_booking()
+        self.post('/api/review/createReview', 'createReview', json=dict(booking, **self.data.review()))
+
+    @task(2)
+    def get_review_by_booking(self):
+        if self.bookings:
+            self.post('/api/review/getReviewByBooking', 'getReviewByBooking', json=self.bookings[-1])
+
+    @task(1)
+    def update_review(self):
+        if self.bookings:
+            self.post('/api/review/updateReview', 'updateReview', json=dict(self.bookings[-1], **self.data.review()))
+
+    @task(1)
+    def delete_review(self):
+        if self.bookings:
+            booking = self.bookings.pop()
+            self.post('/api/review/deleteReview', 'deleteReview', json=booking)
+            self.post('/api/book/deleteBooking', 'deleteBooking', json=booking)
+
+def over_budget(stats, budgets):
+    """Return a message for every endpoint over its p95 latency (ms) or error rate budget"""
+    default = budgets.get('default', {})
+    problems = []
+    for (name, method), entry in stats.entries.items():
+        if not entry.num_requests:
+            continue
+        budget = dict(default, **budgets.get(name, {}))
+        p95 = entry.get_response_time_percentile(0.95)
+        if 'p95_ms' in budget and p95 > budget['p95_ms']:
+            problems.append(f"{method} {name}: p95 {p95:.0f}ms over budget {budget['p95_ms']}ms")
+        if 'error_rate' in budget and entry.fail_ratio > budget['error_rate']:
+            problems.append(f"{method} {name}: error rate {entry.fail_ratio:.2%} over budget {budget['error_rate']:.2%}")
+    return problems
+
+@events.quitting.add_listener
+def check_budgets(environment, **kwargs):
+    with open(BUDGETS) as file:
+        budgets = json.load(file)
+    problems = over_budget(environment.stats, budgets)
+    for problem in problems:
+        print(f"BUDGET EXCEEDED {problem}", file=sys.stderr)
+    if problems:
+        environment.process_exit_code = 1
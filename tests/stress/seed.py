@@ -0,0 +1,32 @@
+"""
+Create the load test accounts and clear what earlier runs left behind.
+
+    PYTHONPATH=. FLASK_ENV=development python tests/stress/seed.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app import create_app
+from app.models.users import User
+from app.models.book import Booking
+from app.models.review import Review
+from app.models.trend import HotelDailyCost
+from app.models.rating import PackageRating
+from app.utils.ingest import ingest
+from data import USERS, user_email, user_rows
+
+def seed():
+    accounts = User.objects(email__in=[user_email(index) for index in range(USERS)])
+    # bulk deletes skip the model hooks, so the rating and trend rollups are recomputed after them
+    if Review.objects(customer__in=accounts).delete():
+        PackageRating.reconcile()
+    if Booking.objects(customer__in=accounts).delete():
+        HotelDailyCost.rebuild()
+    report = ingest('Users', user_rows(USERS))
+    print(f"{report.inserted} load test users created, {USERS - report.inserted} already there")
+
+if __name__ == '__main__':
+    with create_app().app_context():
+        seed()
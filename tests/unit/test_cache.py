@@ -0,0 +1,37 @@
+from app.utils.cache import TTLCache
+import time
+
+def test_cache_read_through_and_counters():
+    """
+    GIVEN an empty TTLCache
+    WHEN the same key is loaded twice
+    THEN check the loader runs once and the hit/miss counters are updated
+    """
+    cache = TTLCache(ttl=60)
+    calls = []
+    loader = lambda: calls.append(1) or "value"
+
+    assert cache.get_or_load("key", loader) == "value"
+    assert cache.get_or_load("key", loader) == "value"
+    assert len(calls) == 1
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'size': 1}
+
+def test_cache_expiry_invalidation_and_lru_bound():
+    """
+    GIVEN a bounded TTLCache with a short TTL
+    WHEN entries expire, are invalidated or overflow the bound
+    THEN check they are no longer returned
+    """
+    cache = TTLCache(ttl=0.05, maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+    cache.invalidate("a")
+    assert cache.get("a") is None
+
+    time.sleep(0.1)
+    assert cache.get("c") is None
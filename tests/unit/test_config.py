@@ -0,0 +1,17 @@
+from app.config import load_config
+
+def test_config_reads_environment_when_loaded(monkeypatch):
+    """
+    GIVEN environment variables set after app.config was imported (e.g. from .env)
+    WHEN the config is loaded
+    THEN check the Mongo host and pool size follow them
+    """
+    monkeypatch.delenv('MONGO_HOST', raising=False)
+    monkeypatch.setenv('FLASK_ENV', 'development')
+    monkeypatch.setenv('MONGO_MAX_POOL_SIZE', '20')
+    config = load_config()
+    assert config['MONGO_HOST'] == 'localhost'
+    assert config['MONGO_MAX_POOL_SIZE'] == 20
+
+    monkeypatch.setenv('FLASK_ENV', 'production')
+    assert load_config()['MONGO_HOST'] == 'db'
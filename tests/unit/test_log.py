@@ -0,0 +1,35 @@
+import json
+import logging
+from app.utils.log import parse_levels, JsonFormatter, debug_sampled, get_logger
+
+def test_parse_levels():
+    """
+    GIVEN a LOG_LEVELS specification
+    WHEN it is parsed
+    THEN check each module maps to a staycation logger level
+    """
+    assert parse_levels("api=debug, auth=WARNING,") == {'staycation.api': 'DEBUG', 'staycation.auth': 'WARNING'}
+    assert parse_levels(None) == {}
+
+def test_json_formatter_includes_extra_fields():
+    """
+    GIVEN a log record with extra fields
+    WHEN it is formatted
+    THEN check the JSON line holds the message and the extra fields
+    """
+    record = logging.LogRecord('staycation.api', logging.INFO, __file__, 1, 'booking %s', ('ok',), None)
+    record.hotel_name = 'Capella Singapore'
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry['message'] == 'booking ok'
+    assert entry['hotel_name'] == 'Capella Singapore'
+    assert entry['level'] == 'INFO'
+
+def test_debug_sampled_skips_when_debug_is_off():
+    """
+    GIVEN a logger whose level is above DEBUG
+    WHEN debug_sampled is called with arguments that cannot be formatted
+    THEN check nothing is formatted or raised
+    """
+    logger = get_logger('test_sampling')
+    logger.setLevel(logging.INFO)
+    debug_sampled(logger, '%d', 'not a number', rate=1)
@@ -26,4 +26,93 @@ class test_new_user_methods(unittest.TestCase):
         self.assertEqual(user.email, 'jack@fgh.com')
         self.assertEqual(user.password, hashpass)
 
-          
\ No newline at end of file
+          
+def test_session_user_cache():
+    """
+    GIVEN a registered User
+    WHEN the session user is loaded twice and its avatar is then changed
+    THEN check the second load needs no query, the password hash is not kept and the change is visible
+    """
+    from app.utils.monitoring import count_commands
+    hashpass = generate_password_hash("12345", method='sha256')
+    user = User.createUser(email="session@cde.com", password=hashpass, name="Session User")
+
+    User.getSessionUser(user.id)
+    with count_commands() as commands:
+        session_user = User.getSessionUser(user.id)
+    assert len(commands) == 0
+    assert session_user.email == "session@cde.com"
+    assert session_user.password is None
+
+    User.addAvatar(session_user, "funguy-min.jpg")
+    assert User.getSessionUser(user.id).avatar == "funguy-min.jpg"
+    assert User.getUser("session@cde.com").password == hashpass
+    user.delete()
+
+def test_package_lookup_miss_not_cached():
+    """
+    GIVEN a hotel name that was looked up before its package existed
+    WHEN the package is then stored without going through this process's cache (another worker, an upload job)
+    THEN check the next lookup finds it
+    """
+    from app.models.package import Package
+    assert Package.getPackage("Late Hotel") is None
+    Package._get_collection().insert_one({'hotel_name': "Late Hotel", 'duration': 1, 'unit_cost': 100.0})
+    try:
+        assert Package.getPackage("Late Hotel").unit_cost == 100.0
+    finally:
+        Package.objects(hotel_name="Late Hotel").delete()
+        Package.invalidateCache()
+
+def test_cached_package_instances_not_shared():
+    """
+    GIVEN a package served from the package cache
+    WHEN one caller changes the instance it got
+    THEN check other callers still get the stored values
+    """
+    from app.models.package import Package
+    Package.createPackage(hotel_name="Shared Hotel", duration=2, unit_cost=100.0, image_url="x", description="Cached")
+    try:
+        package = Package.getPackage("Shared Hotel")
+        package.unit_cost = 1.0
+        next(p for p in Package.getAllPackages() if p.hotel_name == "Shared Hotel").duration = 9
+        assert Package.getPackage("Shared Hotel").unit_cost == 100.0
+        assert next(p for p in Package.getAllPackages() if p.hotel_name == "Shared Hotel").duration == 2
+    finally:
+        Package.objects(hotel_name="Shared Hotel").delete()
+        Package.invalidateCache()
+
+def test_trend_rollup_follows_bookings():
+    """
+    GIVEN a booking
+    WHEN it is created, moved to another check-in date and deleted
+    THEN check its hotel/day rollup bucket follows every change and empty buckets are dropped
+    """
+    from app.models.package import Package
+    from app.models.book import Booking
+    from app.models.trend import HotelDailyCost
+    hashpass = generate_password_hash("12345", method='sha256')
+    user = User.createUser(email="rollup@cde.com", password=hashpass, name="Rollup User")
+    package = Package.createPackage(hotel_name="Rollup Hotel", duration=2, unit_cost=100.0, image_url="x", description="Rollup")
+
+    def buckets():
+        return {row.check_in_date.date().isoformat(): (row.total_cost, row.count)
+                for row in HotelDailyCost.objects(hotel_name="Rollup Hotel")}
+
+    try:
+        Booking.createBooking("2030-03-01", user, package)
+        Booking.createBooking("2030-03-01", user, package)
+        assert buckets() == {'2030-03-01': (400.0, 2)}
+
+        Booking.updateBooking("2030-03-01", "2030-03-02", user, "Rollup Hotel")
+        assert buckets() == {'2030-03-01': (200.0, 1), '2030-03-02': (200.0, 1)}
+
+        Booking.deleteBooking("2030-03-02", user, "Rollup Hotel")
+        Booking.deleteBooking("2030-03-01", user, "Rollup Hotel")
+        assert buckets() == {}
+    finally:
+        Booking.objects(customer=user).delete()
+        HotelDailyCost.objects(hotel_name="Rollup Hotel").delete()
+        Package.objects(hotel_name="Rollup Hotel").delete()
+        Package.invalidateCache()
+        user.delete()
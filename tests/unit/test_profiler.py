@@ -0,0 +1,29 @@
+from app.utils.monitoring import CommandLog, command_shape
+from app.utils.profiler import find_problems
+
+def test_command_shape_ignores_values():
+    """
+    GIVEN two find commands that differ only by the values they filter on
+    WHEN their shapes are computed
+    THEN check the shapes are equal, and differ from a query on another field
+    """
+    first = command_shape('find', {'find': 'appUsers', 'filter': {'email': 'a@b.com'}, 'limit': 1})
+    second = command_shape('find', {'find': 'appUsers', 'filter': {'email': 'c@d.com'}, 'limit': 1})
+    other = command_shape('find', {'find': 'appUsers', 'filter': {'name': 'a'}, 'limit': 1})
+    assert first == second
+    assert first != other
+
+def test_find_problems_flags_repeats_and_slow_queries():
+    """
+    GIVEN a detailed command log with one shape repeated three times and one slow command
+    WHEN it is analysed
+    THEN check an n_plus_one and a slow_query finding are returned
+    """
+    log = CommandLog(detailed=True)
+    for ms in (1, 1, 1):
+        log.details.append({'command': 'find', 'collection': 'staycation', 'shape': 'find staycation {}', 'ms': ms})
+    log.details.append({'command': 'aggregate', 'collection': 'booking', 'shape': 'aggregate booking {}', 'ms': 250})
+
+    problems = find_problems(log, repeat_threshold=3, slow_ms=100)
+    assert {'type': 'n_plus_one', 'shape': 'find staycation {}', 'count': 3} in problems
+    assert {'type': 'slow_query', 'shape': 'aggregate booking {}', 'ms': 250} in problems
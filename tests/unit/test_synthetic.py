@@ -0,0 +1,109 @@
+import csv
+import datetime as dt
+from collections import Counter
+from app.models.users import User
+from app.models.package import Package
+from app.models.book import Booking
+from app.models.review import Review
+from app.models.trend import HotelDailyCost
+from app.models.rating import PackageRating
+from app.utils.synthetic import DatasetGenerator, synthetic_id, user_email
+
+def read(path):
+    with open(path, newline='', encoding='utf-8') as file:
+        return list(csv.DictReader(file))
+
+def test_synthetic_csv_dataset(tmp_path):
+    """
+    GIVEN a synthetic dataset generator
+    WHEN it writes the same dataset twice as CSV files
+    THEN check the files use the /upload columns, are identical between runs and have plausible dates and ratings
+    """
+    generator = DatasetGenerator(users=20, packages=5, bookings=2000, review_rate=0.5, seed=7,
+                                 start=dt.date(2024, 1, 1), days=366)
+    counts = generator.write_csv(tmp_path / 'a')
+    DatasetGenerator(users=20, packages=5, bookings=2000, review_rate=0.5, seed=7,
+                     start=dt.date(2024, 1, 1), days=366).write_csv(tmp_path / 'b')
+
+    assert counts['users.csv'] == 20 and counts['staycation.csv'] == 5 and counts['booking.csv'] == 2000
+    for name in counts:
+        assert (tmp_path / 'a' / name).read_bytes() == (tmp_path / 'b' / name).read_bytes()
+
+    bookings = read(tmp_path / 'a' / 'booking.csv')
+    assert list(bookings[0]) == ['check_in_date', 'customer', 'hotel_name']
+    assert list(read(tmp_path / 'a' / 'users.csv')[0]) == ['email', 'password', 'name']
+    assert list(read(tmp_path / 'a' / 'staycation.csv')[0]) == ['hotel_name', 'duration', 'unit_cost', 'image_url', 'description']
+    months = [dt.date.fromisoformat(row['check_in_date']).month for row in bookings]
+    assert all(dt.date.fromisoformat(row['check_in_date']).year == 2024 for row in bookings)
+    # December is the busiest month and February the quietest
+    assert months.count(12) > months.count(2)
+
+    ratings = [int(row['rating']) for row in read(tmp_path / 'a' / 'reviews.csv')]
+    assert len(ratings) == counts['reviews.csv'] > 0
+    assert ratings.count(5) > ratings.count(2)
+
+def test_synthetic_ids_are_deterministic():
+    """
+    GIVEN the ids of generated documents
+    WHEN they are derived from the kind, seed and index
+    THEN check the same inputs give the same id and different inputs different ids
+    """
+    assert synthetic_id('booking', 7, 42) == synthetic_id('booking', 7, 42)
+    assert len({synthetic_id(kind, seed, 42) for kind in ('user', 'booking') for seed in (7, 8)}) == 4
+
+def generator(seed):
+    return DatasetGenerator(users=10, packages=3, bookings=200, review_rate=0.5, seed=seed,
+                            start=dt.date(2024, 1, 1), days=366)
+
+def test_synthetic_insert():
+    """
+    GIVEN synthetic datasets inserted into Mongo with two seeds, one of them twice, and a third
+          seed whose first user's email is already taken by another account
+    WHEN the bookings, reviews, trend rollup and rating summaries are read back
+    THEN check every booking and review references stored documents and the rollups match them
+    """
+    User._get_collection().insert_one({'email': user_email(13, 0), 'name': "Not synthetic"})
+    try:
+        reports = generator(11).insert(batch_size=50)
+        assert (reports['Users'].inserted, reports['Package'].inserted, reports['Booking'].inserted) == (10, 3, 200)
+        assert reports['Review'].inserted > 0
+
+        # another seed does not collide on the unique emails and hotel names
+        assert generator(12).insert(batch_size=50)['Users'].inserted == 10
+        # the same seed again inserts nothing, so nothing is counted twice
+        rerun = generator(11).insert(batch_size=50)
+        assert rerun['Booking'].inserted == rerun['Review'].inserted == rerun['Review'].rows == 0
+        # bookings of the user that could not be stored are skipped
+        taken = generator(13).insert(batch_size=50)
+        assert taken['Users'].failed == 1 and taken['Booking'].failed > 0
+
+        packages = {package.id: package.hotel_name for package in Package.objects(hotel_name__startswith="Synthetic Hotel")}
+        users = set(User.objects(email__endswith="@synthetic.io").scalar('id'))
+        bookings = list(Booking.objects(package__in=list(packages)).as_pymongo())
+        reviews = list(Review.objects(package__in=list(packages)).as_pymongo())
+        assert all(booking['customer'] in users for booking in bookings)
+        booking_ids = {booking['_id'] for booking in bookings}
+        assert all(review['booking'] in booking_ids for review in reviews)
+
+        costs = Counter()
+        for booking in bookings:
+            costs[packages[booking['package']]] += booking['total_cost']
+        rollup = Counter()
+        for row in HotelDailyCost.objects(hotel_name__in=list(packages.values())):
+            rollup[row.hotel_name] += row.total_cost
+        assert rollup == costs
+
+        for package_id in packages:
+            ratings = [review['rating'] for review in reviews if review['package'] == package_id]
+            summary = PackageRating.getSummary(package_id)
+            assert summary['count'] == len(ratings)
+            assert summary['histogram'] == [ratings.count(rating) for rating in range(1, 6)]
+    finally:
+        package_ids = list(Package.objects(hotel_name__startswith="Synthetic Hotel").scalar('id'))
+        Review.objects(package__in=package_ids).delete()
+        Booking.objects(package__in=package_ids).delete()
+        PackageRating.objects(package__in=package_ids).delete()
+        HotelDailyCost.objects(hotel_name__startswith="Synthetic Hotel").delete()
+        Package.objects(id__in=package_ids).delete()
+        User.objects(email__endswith="@synthetic.io").delete()
+        Package.invalidateCache()